@@ -0,0 +1,221 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+"""Amortization schedule engine.
+
+Schedules are computed in integer cents so installment rows always add up to
+`total_credit` exactly. Two methods are supported:
+
+- Flat: every installment pays owed / term plus interest on the original owed
+  amount (owed * monthly rate), the formula the Finance Application form has
+  always used.
+- French: constant installment (annuity) with interest charged on the
+  outstanding balance.
+
+In both cases installments differ by at most one cent, the leftover cents going
+to the last ones.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+import frappe
+from frappe import _
+from frappe.utils import add_months, cint, flt, getdate
+from frappe.utils.caching import redis_cache
+
+from financed_sales.financed_sales.doctype.financed_sales_settings.financed_sales_settings import get_settings
+
+AMORTIZATION_METHODS = ("Flat", "French")
+MAX_REPAYMENT_TERM = 360
+SCHEDULE_CACHE_TTL = 24 * 60 * 60
+DEFAULT_COMPARISON_TERMS = (6, 12, 18, 24)
+MAX_COMPARISON_OPTIONS = 500
+
+
+@frappe.whitelist()
+def get_amortization_schedule(
+	total_amount_to_finance,
+	down_payment_amount,
+	interest_rate,
+	repayment_term,
+	first_installment,
+	rate_period="Monthly",
+	amortization_method="Flat",
+	installment=None,
+):
+	"""Compute a Finance Application installment schedule.
+
+	Args:
+		total_amount_to_finance: Sale total, down payment included.
+		down_payment_amount: Down payment, not financed.
+		interest_rate: Rate in percent, per month or per year depending on `rate_period`.
+		repayment_term: Number of monthly installments (1 to `MAX_REPAYMENT_TERM`).
+		first_installment: Due date of the first installment.
+		rate_period: "Monthly" or "Annual".
+		amortization_method: "Flat" or "French".
+		installment (optional): Fixed installment amount entered by the user; every row uses it.
+
+	Returns:
+		dict: installment, installments (rows with due_date and amount), total_credit,
+			interests and credit_expiration_date.
+	"""
+	repayment_term = cint(repayment_term)
+	if not 0 < repayment_term <= MAX_REPAYMENT_TERM:
+		frappe.throw(_("Repayment term must be between 1 and {0} months").format(MAX_REPAYMENT_TERM))
+	if amortization_method not in AMORTIZATION_METHODS:
+		frappe.throw(_("Unknown amortization method: {0}").format(amortization_method))
+	if not first_installment:
+		frappe.throw(_("First installment date is required"))
+
+	owed_cents = to_cents(flt(total_amount_to_finance) - flt(down_payment_amount))
+	if owed_cents < 0:
+		frappe.throw(_("Down payment cannot be greater than the amount to finance"))
+
+	# Normalize arguments so equal inputs from the form and from Python share a cache entry
+	return compute_schedule(
+		owed_cents,
+		str(get_monthly_rate(interest_rate, rate_period)),
+		repayment_term,
+		str(getdate(first_installment)),
+		amortization_method,
+		to_cents(installment) if flt(installment) else None,
+	)
+
+
+@frappe.whitelist()
+def compare_financing_options(
+	quotation,
+	terms=None,
+	interest_rates=None,
+	down_payment_percents=None,
+	rate_period=None,
+	amortization_method="Flat",
+):
+	"""Compare financing options for a Quotation over every term x rate x down payment combination.
+
+	Args:
+		quotation: Quotation name; its grand total is the amount to finance.
+		terms (list, optional): Repayment terms in months. Defaults to `DEFAULT_COMPARISON_TERMS`.
+		interest_rates (list, optional): Interest rates in percent. Defaults to the settings rate.
+		down_payment_percents (list, optional): Down payments as a percent of the grand total.
+			Defaults to the settings percent.
+		rate_period (optional): "Monthly" or "Annual". Defaults to the settings period.
+		amortization_method: "Flat" or "French".
+
+	Returns:
+		list: One dict per combination with term, interest_rate, down_payment_percent,
+			down_payment_amount, installment, total_credit and interests.
+	"""
+	frappe.has_permission("Quotation", "read", quotation, throw=True)
+	if amortization_method not in AMORTIZATION_METHODS:
+		frappe.throw(_("Unknown amortization method: {0}").format(amortization_method))
+
+	settings = get_settings()
+	grand_total = flt(frappe.db.get_value("Quotation", quotation, "grand_total"))
+	rate_period = rate_period or settings.rate_period
+	# empty lists fall back to the defaults too
+	terms = [cint(term) for term in frappe.parse_json(terms) or DEFAULT_COMPARISON_TERMS]
+	interest_rates = [flt(rate) for rate in frappe.parse_json(interest_rates) or [settings.interest_rate]]
+	down_payment_percents = [
+		flt(percent)
+		for percent in frappe.parse_json(down_payment_percents) or [settings.down_payment_percent]
+	]
+
+	if any(not 0 < term <= MAX_REPAYMENT_TERM for term in terms):
+		frappe.throw(_("Repayment term must be between 1 and {0} months").format(MAX_REPAYMENT_TERM))
+	if any(not 0 <= percent <= 100 for percent in down_payment_percents):
+		frappe.throw(_("Down payment percent must be between 0 and 100"))
+	if len(terms) * len(interest_rates) * len(down_payment_percents) > MAX_COMPARISON_OPTIONS:
+		frappe.throw(_("Too many combinations, the limit is {0}").format(MAX_COMPARISON_OPTIONS))
+
+	get_amounts = get_french_amounts if amortization_method == "French" else get_flat_amounts
+	monthly_rates = {rate: get_monthly_rate(rate, rate_period) for rate in interest_rates}
+	total_cents = to_cents(grand_total)
+
+	options = []
+	for percent in down_payment_percents:
+		down_payment_cents = _round_cents(total_cents * Decimal(str(percent)) / 100)
+		owed_cents = total_cents - down_payment_cents
+		for rate in interest_rates:
+			for term in terms:
+				amounts = get_amounts(owed_cents, monthly_rates[rate], term)
+				total_credit = sum(amounts)
+				options.append(
+					{
+						"term": term,
+						"interest_rate": rate,
+						"down_payment_percent": percent,
+						"down_payment_amount": from_cents(down_payment_cents),
+						"installment": from_cents(amounts[0]),
+						"total_credit": from_cents(total_credit),
+						"interests": from_cents(total_credit - owed_cents),
+					}
+				)
+	return options
+
+
+@redis_cache(ttl=SCHEDULE_CACHE_TTL)
+def compute_schedule(
+	owed_cents, monthly_rate, repayment_term, first_installment, amortization_method, installment_cents=None
+):
+	"""Cached schedule computation over normalized inputs (amounts in cents, rate as a decimal string)."""
+	if installment_cents:
+		amounts = [installment_cents] * repayment_term
+	elif amortization_method == "French":
+		amounts = get_french_amounts(owed_cents, Decimal(monthly_rate), repayment_term)
+	else:
+		amounts = get_flat_amounts(owed_cents, Decimal(monthly_rate), repayment_term)
+
+	total_credit = sum(amounts)
+	return {
+		"installment": from_cents(amounts[0]),
+		"installments": [
+			{"due_date": str(add_months(first_installment, idx)), "amount": from_cents(amount)}
+			for idx, amount in enumerate(amounts)
+		],
+		"total_credit": from_cents(total_credit),
+		"interests": from_cents(total_credit - owed_cents),
+		"credit_expiration_date": str(add_months(first_installment, repayment_term - 1)),
+	}
+
+
+def get_flat_amounts(owed_cents, monthly_rate, repayment_term):
+	"""Owed plus interest on the original owed amount for every period, split into equal installments."""
+	interest_cents = _round_cents(owed_cents * monthly_rate * repayment_term)
+	return _split_evenly(owed_cents + interest_cents, repayment_term)
+
+
+def get_french_amounts(owed_cents, monthly_rate, repayment_term):
+	"""Annuity installments with interest on the outstanding balance.
+
+	The annuity is kept unrounded and only the total is rounded, so rounding the
+	payment to cents does not compound over long terms.
+	"""
+	if not monthly_rate:
+		return get_flat_amounts(owed_cents, monthly_rate, repayment_term)
+
+	payment = owed_cents * monthly_rate / (1 - (1 + monthly_rate) ** -repayment_term)
+	return _split_evenly(_round_cents(payment * repayment_term), repayment_term)
+
+
+def get_monthly_rate(interest_rate, rate_period="Monthly"):
+	"""Convert a percent rate to a monthly decimal rate."""
+	return Decimal(str(flt(interest_rate))) / (100 if rate_period == "Monthly" else 1200)
+
+
+def to_cents(amount):
+	return int(_round_cents(Decimal(str(flt(amount))) * 100))
+
+
+def from_cents(amount_in_cents):
+	return amount_in_cents / 100
+
+
+def _split_evenly(total_cents, repayment_term):
+	# leftover cents go one each to the last installments
+	base, remainder = divmod(total_cents, repayment_term)
+	return [base] * (repayment_term - remainder) + [base + 1] * remainder
+
+
+def _round_cents(value):
+	return int(Decimal(value).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
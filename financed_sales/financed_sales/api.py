@@ -6,17 +6,19 @@ from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_ent
 from frappe import _
 
 from .allocation_wrapper import analyze_payment_allocation
+from .doctype.financed_sales_settings.financed_sales_settings import get_settings
+from .mode_of_payment import get_mode_of_payment_account, get_mode_of_payment_details
+from .payment_requests import run_payment_request
 from .penalty_journal import create_penalty_journal_entry
 
+# How long bulk payment results stay available for polling (seconds)
+BULK_RESULTS_TTL = 24 * 60 * 60
+
 
 def validate_payment_date(payment_plan_name, posting_date):
 	if not posting_date:
 		return
-	result = frappe.db.sql(
-		"SELECT MAX(date) as max_date FROM `tabFinanced Payment Ref` WHERE parent = %s",
-		payment_plan_name,
-	)
-	last_date = result[0][0] if result and result[0] else None
+	last_date = frappe.db.get_value("Payment Plan", payment_plan_name, "last_payment_date")
 	if last_date:
 		if isinstance(posting_date, str):
 			posting_date = frappe.utils.getdate(posting_date)
@@ -80,7 +82,7 @@ def create_finance_application(quotation_name):
 	Application will be created.
 	Returns: {'name': <new Finance Application name>'}
 	"""
-	settings = frappe.get_single("Financed Sales Settings")
+	settings = get_settings()
 	quotation = frappe.get_doc("Quotation", quotation_name)
 	down_payment = (settings.down_payment_percent or 0) * quotation.grand_total / 100
 	application = frappe.get_doc(
@@ -93,7 +95,7 @@ def create_finance_application(quotation_name):
 			"pending_down_payment_amount": down_payment,
 			"interest_rate": settings.interest_rate,
 			"application_fee": settings.application_fee,
-			"rate_period": settings.rate_period or "Monthly",
+			"rate_period": settings.rate_period,
 		}
 	).insert()
 
@@ -120,8 +122,26 @@ def create_down_payment_from_fin_app(fin_app_name):
 
 @frappe.whitelist()
 def create_payment_entry_from_payment_plan(
-	payment_plan_name, paid_amount, mode_of_payment, submit=False, reference_number=None, reference_date=None, posting_date=None
+	payment_plan_name,
+	paid_amount,
+	mode_of_payment,
+	submit=False,
+	reference_number=None,
+	reference_date=None,
+	posting_date=None,
+	idempotency_key=None,
+	queue=False,
 ):
+	"""
+	Creates the Payment Entry (and penalty Journal Entry if needed) for a
+	payment against `payment_plan_name`.
+	`idempotency_key`: optional client generated key; retrying a call with the
+	same key returns the stored result instead of posting the payment again.
+	`queue`: if set, the payment is posted by a background job and the call
+	returns immediately.
+	Returns: <new Payment Entry name>, or { status, idempotency_key } while a
+	keyed or queued payment is pending.
+	"""
 	# Validate required parameters
 	if not mode_of_payment:
 		frappe.throw(_("Payment method is required. Please select a payment method."))
@@ -134,13 +154,65 @@ def create_payment_entry_from_payment_plan(
 	if posting_date:
 		validate_payment_date(payment_plan_name, posting_date)
 
+	if idempotency_key or frappe.utils.cint(queue):
+		return run_payment_request(
+			"Payment Plan",
+			payment_plan_name,
+			{
+				"payment_plan_name": payment_plan_name,
+				"paid_amount": paid_amount,
+				"mode_of_payment": mode_of_payment,
+				"submit": submit,
+				"reference_number": reference_number,
+				"reference_date": reference_date,
+				"posting_date": posting_date,
+			},
+			idempotency_key,
+			queue,
+		)
+
 	# Get payment plan document for allocation analysis
 	payment_plan = frappe.get_doc("Payment Plan", payment_plan_name)
 
+	pe_name = post_payment_plan_payment(
+		payment_plan,
+		paid_amount,
+		mode_of_payment,
+		submit,
+		reference_number,
+		reference_date,
+		posting_date,
+	)
+
+	# Resync penalties to today after payment
+	# Reload to get updated paid_amount from update_payments() hook
+	payment_plan.reload()
+	payment_plan.calculate_overdue_penalties(commit=False)
+
+	return pe_name
+
+
+def post_payment_plan_payment(
+	payment_plan,
+	paid_amount,
+	mode_of_payment,
+	submit=False,
+	reference_number=None,
+	reference_date=None,
+	posting_date=None,
+):
+	"""
+	Run the payment pipeline for an already validated payment against `payment_plan`:
+	recalculate penalties at the payment date, create the penalty Journal Entry if the
+	allocation reaches penalties, then create the Payment Entry.
+	Nothing is committed, so a failure can roll the whole payment back.
+	Callers are responsible for reloading the plan and resyncing penalties afterwards.
+	Returns: <new Payment Entry name>
+	"""
 	# Recalculate penalties based on payment date
 	# This ensures penalty reflects the date being recorded
 	calc_date = posting_date if posting_date else frappe.utils.today()
-	payment_plan.calculate_overdue_penalties(calc_date)
+	payment_plan.calculate_overdue_penalties(calc_date, commit=False)
 
 	# Use allocation analysis to determine if penalty payment is needed
 	allocation_result = analyze_payment_allocation(payment_plan, paid_amount)
@@ -152,15 +224,14 @@ def create_payment_entry_from_payment_plan(
 		journal_entry_name = create_penalty_journal_entry(
 			penalty_amount=allocation_result["penalty_amount"],
 			customer=payment_plan.customer,
-			payment_plan_name=payment_plan_name,
+			payment_plan_name=payment_plan.name,
 			posting_date=posting_date,
 		)
 
 	# Create payment entry with appropriate references
-	si_name = frappe.db.get_value("Payment Plan", payment_plan_name, "credit_invoice")
-	si = SimpleNamespace(doctype="Sales Invoice", name=si_name)
+	si = SimpleNamespace(doctype="Sales Invoice", name=payment_plan.credit_invoice)
 
-	pe_name = create_payment_entry(
+	return create_payment_entry(
 		si,
 		paid_amount,
 		mode_of_payment,
@@ -172,12 +243,170 @@ def create_payment_entry_from_payment_plan(
 		posting_date,
 	)
 
-	# Resync penalties to today after payment
-	# Reload to get updated paid_amount from update_payments() hook
-	payment_plan.reload()
-	payment_plan.calculate_overdue_penalties()
 
-	return pe_name
+@frappe.whitelist()
+def create_payment_entries_from_payment_plans(payments, submit=True):
+	"""
+	Post many Payment Plan payments in one call.
+	`payments`: list of dicts [{ payment_plan, paid_amount, mode_of_payment,
+	reference_number, reference_date, posting_date }, …]
+	Every row is validated up front with batched queries; valid rows are grouped
+	by Payment Plan and posted in a background job, one plan at a time.
+	Returns: { batch_id, job_id, results: [{ row, payment_plan, status, error }, …] }
+	Posting results can be polled with `get_bulk_payment_results(batch_id)`.
+	"""
+	payments = frappe.parse_json(payments) or []
+	if not payments:
+		frappe.throw(_("No payments to post"))
+
+	results, groups = validate_bulk_payments(payments)
+
+	batch_id = frappe.generate_hash(length=12)
+	job_id = None
+	if groups:
+		frappe.cache().set_value(_get_bulk_payments_key(batch_id), results, expires_in_sec=BULK_RESULTS_TTL)
+		job = frappe.enqueue(
+			"financed_sales.financed_sales.api.post_bulk_payments",
+			queue="long",
+			timeout=3600,
+			batch_id=batch_id,
+			groups=groups,
+			results=results,
+			submit=frappe.utils.cint(submit),
+		)
+		job_id = job.id if job and hasattr(job, "id") else None
+
+	return {"batch_id": batch_id, "job_id": job_id, "results": results}
+
+
+@frappe.whitelist()
+def get_bulk_payment_results(batch_id):
+	"""Returns the per-row results of a bulk payment batch, or None once they expire."""
+	return frappe.cache().get_value(_get_bulk_payments_key(batch_id))
+
+
+def validate_bulk_payments(payments):
+	"""
+	Validate bulk payment rows resolving every plan (with its last payment date)
+	and its company in one query each; payment methods come from the Mode of
+	Payment cache and are checked for an account in the plan's company.
+	Returns: (results, groups) where `results` has one entry per input row and
+	`groups` maps each valid Payment Plan to its rows in posting order.
+	"""
+	plan_names = list({row.get("payment_plan") for row in payments if row.get("payment_plan")})
+
+	plans = {
+		plan.name: plan
+		for plan in frappe.get_all(
+			"Payment Plan",
+			filters={"name": ["in", plan_names]},
+			fields=["name", "docstatus", "credit_invoice", "last_payment_date"],
+		)
+	} if plan_names else {}
+	invoice_names = list({plan.credit_invoice for plan in plans.values() if plan.credit_invoice})
+	invoice_companies = dict(
+		frappe.get_all(
+			"Sales Invoice", filters={"name": ["in", invoice_names]}, fields=["name", "company"], as_list=True
+		)
+	) if invoice_names else {}
+
+	results = []
+	groups = {}
+	for index, row in enumerate(payments):
+		plan_name = row.get("payment_plan")
+		error = None
+		posting_date = frappe.utils.getdate(row.get("posting_date")) if row.get("posting_date") else None
+		last_date = plans[plan_name].last_payment_date if plan_name in plans else None
+		company = invoice_companies.get(plans[plan_name].credit_invoice) if plan_name in plans else None
+
+		if not plan_name or plan_name not in plans:
+			error = _("Payment Plan {0} not found").format(plan_name)
+		elif plans[plan_name].docstatus != 1:
+			error = _("Payment Plan {0} is not submitted").format(plan_name)
+		elif not plans[plan_name].credit_invoice:
+			error = _("Payment Plan {0} has no credit invoice").format(plan_name)
+		elif not row.get("mode_of_payment"):
+			error = _("Payment method is required. Please select a payment method.")
+		# resolved like create_payment_entry does: the company's account, else the default one
+		elif not get_mode_of_payment_account(row.get("mode_of_payment"), company):
+			error = _("Default account not set for Mode of Payment '{0}'.").format(row.get("mode_of_payment"))
+		elif frappe.utils.flt(row.get("paid_amount")) <= 0:
+			error = _("Payment amount is required. Please enter the amount to pay.")
+		elif posting_date and last_date and posting_date < last_date:
+			error = _("Payment date cannot be before {0}.").format(frappe.format(last_date, "Date"))
+
+		results.append(
+			{
+				"row": index,
+				"payment_plan": plan_name,
+				"status": "Invalid" if error else "Queued",
+				"error": error,
+				"payment_entry": None,
+			}
+		)
+		if not error:
+			groups.setdefault(plan_name, []).append(dict(row, row=index))
+
+	# Payments must be recorded in chronological order within each plan
+	for rows in groups.values():
+		rows.sort(key=lambda r: frappe.utils.getdate(r.get("posting_date") or frappe.utils.today()))
+
+	return results, groups
+
+
+def post_bulk_payments(batch_id, groups, results, submit=True):
+	"""
+	Background job: post every validated payment group, one Payment Plan at a time.
+	Each posted payment is committed on its own. A failure rolls back only the
+	failing payment and skips the rest of that plan's group, since later payments
+	depend on it; other plans keep posting. The failed plan's penalties are then
+	resynced to today, since its committed payments left them at their posting dates.
+	"""
+	for plan_name, rows in groups.items():
+		try:
+			payment_plan = frappe.get_doc("Payment Plan", plan_name)
+			for row in rows:
+				results[row["row"]]["payment_entry"] = post_payment_plan_payment(
+					payment_plan,
+					frappe.utils.flt(row["paid_amount"]),
+					row["mode_of_payment"],
+					submit,
+					row.get("reference_number"),
+					row.get("reference_date"),
+					row.get("posting_date"),
+				)
+				results[row["row"]]["status"] = "Posted"
+				frappe.db.commit()
+				payment_plan.reload()
+
+			# Resync penalties to today once per plan instead of after every payment
+			payment_plan.calculate_overdue_penalties()
+			frappe.db.commit()
+		except Exception as e:
+			frappe.db.rollback()
+			frappe.log_error(f"Bulk payment posting failed for Payment Plan {plan_name}: {e!s}")
+			for row in rows:
+				if results[row["row"]]["status"] == "Queued":
+					results[row["row"]]["status"] = "Failed"
+					results[row["row"]]["error"] = str(e)
+			_resync_penalties(plan_name)
+
+		frappe.cache().set_value(_get_bulk_payments_key(batch_id), results, expires_in_sec=BULK_RESULTS_TTL)
+
+	return results
+
+
+def _resync_penalties(plan_name):
+	"""Bring penalties back to today after a failed group; earlier payments committed them as of their date."""
+	try:
+		frappe.get_doc("Payment Plan", plan_name).calculate_overdue_penalties()
+	except Exception:
+		frappe.db.rollback()
+		frappe.log_error(f"Penalty resync failed for Payment Plan {plan_name}")
+
+
+def _get_bulk_payments_key(batch_id):
+	return f"financed_sales:bulk_payments:{batch_id}"
 
 
 @frappe.whitelist()
@@ -188,6 +417,8 @@ def create_payment_entry_from_finance_application(
 	submit=False,
 	reference_number=None,
 	reference_date=None,
+	idempotency_key=None,
+	queue=False,
 ):
 	# Validate required parameters
 	if not mode_of_payment:
@@ -196,6 +427,22 @@ def create_payment_entry_from_finance_application(
 		frappe.throw(_("Payment amount is required. Please enter the amount to pay."))
 
 	paid_amount = float(paid_amount)
+
+	if idempotency_key or frappe.utils.cint(queue):
+		return run_payment_request(
+			"Finance Application",
+			finance_application_name,
+			{
+				"finance_application_name": finance_application_name,
+				"paid_amount": paid_amount,
+				"mode_of_payment": mode_of_payment,
+				"submit": submit,
+				"reference_number": reference_number,
+				"reference_date": reference_date,
+			},
+			idempotency_key,
+			queue,
+		)
 	so_name = frappe.db.get_value("Finance Application", finance_application_name, "sales_order")
 	so = SimpleNamespace(doctype="Sales Order", name=so_name)
 	return create_payment_entry(so, paid_amount, mode_of_payment, submit, reference_number, reference_date)
@@ -215,13 +462,11 @@ def create_payment_entry(
 	pe = get_payment_entry(doc.doctype, doc.name, party_amount=paid_amount)
 	pe.mode_of_payment = mode_of_payment
 
-	mode_of_payment_doc = frappe.get_doc("Mode of Payment", mode_of_payment)
-	if not mode_of_payment_doc.accounts:
-		frappe.throw(
-			f"No accounts configured for Mode of Payment '{mode_of_payment}'. Please configure at least one account."
-		)
+	mode_of_payment_details = get_mode_of_payment_details(mode_of_payment)
+	if not mode_of_payment_details:
+		frappe.throw(f"Mode of Payment '{mode_of_payment}' not found.")
 
-	account = mode_of_payment_doc.accounts[0].default_account
+	account = mode_of_payment_details.accounts.get(pe.company) or mode_of_payment_details.default_account
 	if not account:
 		frappe.throw(
 			f"Default account not set for Mode of Payment '{mode_of_payment}'. Please configure the default account."
@@ -234,7 +479,7 @@ def create_payment_entry(
 		pe.posting_date = posting_date
 
 	# Set reference number and date for Bank type payments
-	mode_of_payment_type = frappe.db.get_value("Mode of Payment", mode_of_payment, "type")
+	mode_of_payment_type = mode_of_payment_details.type
 	if mode_of_payment_type == "Bank" and reference_number:
 		pe.reference_no = reference_number
 	if mode_of_payment_type == "Bank" and reference_date:
@@ -0,0 +1,74 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+"""Compare query plans and timings of the hot queries with and without their indexes.
+
+Run with:
+	bench --site <site> execute financed_sales.financed_sales.benchmarks.hot_query_plans.run
+"""
+
+import time
+
+import frappe
+from frappe.utils import today
+
+from financed_sales.financed_sales.doctype.financed_payment_ref.financed_payment_ref import PARENT_DATE_INDEX
+from financed_sales.financed_sales.doctype.payment_plan_installment.payment_plan_installment import (
+	OVERDUE_INDEX,
+)
+
+OVERDUE_QUERY = """
+	SELECT ppi.parent, SUM(ppi.pending_amount)
+	FROM `tabPayment Plan Installment` ppi {index_hint}
+	INNER JOIN `tabPayment Plan` pp ON pp.name = ppi.parent
+	WHERE ppi.due_date < %(today)s
+	AND ppi.pending_amount > 0
+	AND pp.docstatus = 1
+	GROUP BY ppi.parent
+"""
+
+LAST_PAYMENT_DATE_QUERY = """
+	SELECT MAX(date)
+	FROM `tabFinanced Payment Ref` {index_hint}
+	WHERE parent = %(payment_plan)s
+"""
+
+
+def run(runs=20):
+	"""Print EXPLAIN output and average timings for each hot query.
+
+	Each query is run once with its index ignored (the plan before the patch)
+	and once as the optimizer chooses (the plan after the patch).
+
+	Returns:
+		list: One dict per query and variant with the plan rows and average ms.
+	"""
+	payment_plan = frappe.db.get_value("Payment Plan", {"docstatus": 1}, "name") or ""
+	cases = (
+		("overdue installments", OVERDUE_QUERY, OVERDUE_INDEX, {"today": today()}),
+		("last payment date", LAST_PAYMENT_DATE_QUERY, PARENT_DATE_INDEX, {"payment_plan": payment_plan}),
+	)
+
+	results = []
+	for label, query, index_name, values in cases:
+		for variant, index_hint in (("without index", f"IGNORE INDEX (`{index_name}`)"), ("with index", "")):
+			sql = query.format(index_hint=index_hint)
+			plan = frappe.db.sql(f"EXPLAIN {sql}", values, as_dict=True)
+			avg_ms = _time_query(sql, values, runs)
+			results.append({"query": label, "variant": variant, "plan": plan, "avg_ms": avg_ms})
+
+			print(f"\n{label} ({variant}): {avg_ms:.2f} ms avg over {runs} runs")
+			for row in plan:
+				print(
+					f"  table={row.get('table')} type={row.get('type')} key={row.get('key')} "
+					f"rows={row.get('rows')} extra={row.get('Extra')}"
+				)
+
+	return results
+
+
+def _time_query(sql, values, runs):
+	start = time.perf_counter()
+	for _ in range(runs):
+		frappe.db.sql(sql, values)
+	return (time.perf_counter() - start) * 1000 / runs
@@ -0,0 +1,134 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+"""Bulk approval of Finance Applications.
+
+Selected applications are split into chunks, one background job per chunk.
+Each application is approved through the workflow and committed on its own,
+so a failure only rolls back that application. The approval documents are
+created inline in the chunk job, which keeps settings and other cached
+documents warm across the whole chunk.
+
+Progress is tracked in a Redis hash per batch and pushed to the requesting
+user with `frappe.publish_progress`.
+"""
+
+import frappe
+from frappe import _
+from frappe.model.workflow import apply_workflow
+
+from financed_sales.financed_sales.utils import get_cached_hash
+
+# Redis hash per batch: application -> its approval_status or the error message, plus the batch size
+BULK_APPROVAL_KEY = "financed_sales:bulk_approval"
+TOTAL_FIELD = "__total__"
+BULK_APPROVAL_TTL = 24 * 60 * 60
+BULK_APPROVAL_CHUNK_SIZE = 25
+APPROVE_ACTION = "Approve"
+APPROVED_STATUS = "Completed"
+
+
+@frappe.whitelist()
+def bulk_approve_finance_applications(finance_applications):
+	"""Queue approval of Pending Finance Applications in chunks.
+
+	Args:
+		finance_applications (list): Finance Application names. Applications that
+			are not Pending are skipped.
+
+	Returns:
+		dict: batch_id and the number of applications queued.
+	"""
+	frappe.has_permission("Finance Application", "write", throw=True)
+	names = frappe.parse_json(finance_applications) or []
+	pending = (
+		frappe.get_all(
+			"Finance Application",
+			filters={"name": ["in", names], "workflow_state": "Pending", "docstatus": 1},
+			pluck="name",
+		)
+		if names
+		else []
+	)
+	if not pending:
+		frappe.throw(_("None of the selected Finance Applications is Pending"))
+
+	batch_id = frappe.generate_hash(length=12)
+	cache_key = _get_batch_key(batch_id)
+	cache = frappe.cache()
+	cache.hset(cache_key, TOTAL_FIELD, len(pending))
+	cache.expire(cache.make_key(cache_key), BULK_APPROVAL_TTL)
+
+	for start in range(0, len(pending), BULK_APPROVAL_CHUNK_SIZE):
+		frappe.enqueue(
+			"financed_sales.financed_sales.bulk_approval.approve_chunk",
+			queue="long",
+			enqueue_after_commit=True,
+			batch_id=batch_id,
+			finance_applications=pending[start : start + BULK_APPROVAL_CHUNK_SIZE],
+		)
+
+	return {"batch_id": batch_id, "queued": len(pending)}
+
+
+def approve_chunk(batch_id, finance_applications):
+	"""Background job: approve each application and commit it on its own."""
+	frappe.flags.in_bulk_approval = True
+	try:
+		for name in finance_applications:
+			try:
+				apply_workflow(frappe.get_doc("Finance Application", name), APPROVE_ACTION)
+				frappe.db.commit()
+				# the approval documents can still fail (and roll back) after the workflow moved on
+				result = frappe.db.get_value("Finance Application", name, "approval_status")
+			except Exception as e:
+				frappe.db.rollback()
+				frappe.log_error(
+					title=_("Bulk approval failed"),
+					reference_doctype="Finance Application",
+					reference_name=name,
+				)
+				result = str(e) or e.__class__.__name__
+
+			_record_result(batch_id, name, result)
+	finally:
+		frappe.flags.in_bulk_approval = False
+
+
+@frappe.whitelist()
+def get_bulk_approval_status(batch_id):
+	"""Return the progress of a bulk approval batch.
+
+	Returns:
+		dict: total, processed, approved (list) and failed (application -> approval_status
+			or error), or None if the batch is unknown or expired.
+	"""
+	results = get_cached_hash(_get_batch_key(batch_id))
+	if not results:
+		return None
+
+	total = results.pop(TOTAL_FIELD, 0)
+	return {
+		"total": total,
+		"processed": len(results),
+		"approved": [name for name, result in results.items() if result == APPROVED_STATUS],
+		"failed": {name: result for name, result in results.items() if result != APPROVED_STATUS},
+	}
+
+
+def _record_result(batch_id, finance_application, result):
+	cache = frappe.cache()
+	cache_key = _get_batch_key(batch_id)
+	cache.hset(cache_key, finance_application, result)
+
+	total = cache.hget(cache_key, TOTAL_FIELD) or 0
+	processed = cache.hlen(cache.make_key(cache_key)) - 1
+	frappe.publish_progress(
+		processed * 100 / total if total else 100,
+		title=_("Approving Finance Applications"),
+		description=_("{0} of {1} processed").format(processed, total),
+	)
+
+
+def _get_batch_key(batch_id):
+	return f"{BULK_APPROVAL_KEY}:{batch_id}"
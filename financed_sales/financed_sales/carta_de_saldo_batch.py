@@ -0,0 +1,150 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+"""Batch issuance of Cartas de Saldo.
+
+Completed Payment Plans without a submitted letter are found with one
+anti-join, then the letters are created (or existing drafts reused) and
+submitted in chunks, committing each letter on its own. Optionally one merged
+PDF per company is rendered and attached as a private File.
+"""
+
+import io
+
+import frappe
+from frappe import _
+from frappe.utils import today
+
+CHUNK_SIZE = 50
+
+
+@frappe.whitelist()
+def issue_cartas_de_saldo(merge_pdf=False):
+	"""Queue issuance of every missing Carta de Saldo.
+
+	Args:
+		merge_pdf (bool): Also render one merged PDF per company.
+
+	Returns:
+		str: Background job ID. The user is notified through the
+			`carta_de_saldo_batch_ready` realtime event when it finishes.
+	"""
+	frappe.has_permission("Carta de Saldo", "submit", throw=True)
+	job = frappe.enqueue(
+		"financed_sales.financed_sales.carta_de_saldo_batch.run_carta_de_saldo_batch",
+		queue="long",
+		job_id="carta_de_saldo_batch",
+		deduplicate=True,
+		merge_pdf=frappe.utils.cint(merge_pdf),
+		user=frappe.session.user,
+	)
+	return job.id if job else None
+
+
+def run_carta_de_saldo_batch(merge_pdf=False, user=None):
+	"""Create and submit the missing Cartas de Saldo.
+
+	Returns:
+		dict: issued (count), failed (plan -> error) and files (company -> File URL).
+	"""
+	plans = get_plans_without_carta()
+	issued_by_company = {}
+	failed = {}
+
+	for start in range(0, len(plans), CHUNK_SIZE):
+		chunk = plans[start : start + CHUNK_SIZE]
+		drafts = _get_draft_cartas([plan.payment_plan for plan in chunk])
+		for plan in chunk:
+			try:
+				carta = issue_carta_de_saldo(plan.payment_plan, drafts.get(plan.payment_plan))
+				frappe.db.commit()
+			except Exception as e:
+				frappe.db.rollback()
+				frappe.log_error(
+					title=_("Carta de Saldo batch issuance failed"),
+					reference_doctype="Payment Plan",
+					reference_name=plan.payment_plan,
+				)
+				failed[plan.payment_plan] = str(e) or e.__class__.__name__
+				continue
+			issued_by_company.setdefault(plan.company or "", []).append(carta)
+
+	files = {}
+	if merge_pdf:
+		for company, cartas in issued_by_company.items():
+			files[company] = build_merged_pdf(company, cartas)
+		frappe.db.commit()
+
+	result = {
+		"issued": sum(len(cartas) for cartas in issued_by_company.values()),
+		"failed": failed,
+		"files": files,
+	}
+	if user:
+		frappe.publish_realtime("carta_de_saldo_batch_ready", result, user=user)
+	return result
+
+
+def get_plans_without_carta():
+	"""Completed, submitted Payment Plans that have no submitted Carta de Saldo, with their company."""
+	return frappe.db.sql(
+		"""
+		SELECT pp.name AS payment_plan, si.company AS company
+		FROM `tabPayment Plan` pp
+		LEFT JOIN `tabCarta de Saldo` cds
+			ON cds.payment_plan = pp.name AND cds.docstatus = 1
+		LEFT JOIN `tabSales Invoice` si ON si.name = pp.credit_invoice
+		WHERE pp.docstatus = 1
+		AND pp.status = 'Completed'
+		AND cds.name IS NULL
+		ORDER BY si.company, pp.name
+		""",
+		as_dict=True,
+	)
+
+
+def issue_carta_de_saldo(payment_plan, draft=None):
+	"""Submit the plan's draft Carta de Saldo, or create and submit a new one."""
+	if draft:
+		carta = frappe.get_doc("Carta de Saldo", draft)
+	else:
+		carta = frappe.new_doc("Carta de Saldo")
+		carta.payment_plan = payment_plan
+		carta.issue_date = today()
+		carta.insert()
+	carta.submit()
+	return carta.name
+
+
+def build_merged_pdf(company, cartas):
+	"""Render the given Cartas de Saldo into one PDF File and return its URL."""
+	from pypdf import PdfWriter
+
+	writer = PdfWriter()
+	for carta in cartas:
+		frappe.get_print("Carta de Saldo", carta, as_pdf=True, output=writer)
+
+	content = io.BytesIO()
+	writer.write(content)
+
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": f"cartas-de-saldo-{frappe.scrub(company or 'sin-empresa')}-{today()}.pdf",
+			"is_private": 1,
+			"content": content.getvalue(),
+		}
+	).insert(ignore_permissions=True)
+	return file_doc.file_url
+
+
+def _get_draft_cartas(payment_plans):
+	return {
+		row.payment_plan: row.name
+		for row in frappe.get_all(
+			"Carta de Saldo",
+			filters={"payment_plan": ["in", payment_plans], "docstatus": 0},
+			fields=["name", "payment_plan"],
+			order_by="creation desc",
+		)
+	}
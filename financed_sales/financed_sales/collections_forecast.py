@@ -0,0 +1,264 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+"""Portfolio cash-flow forecast.
+
+Expected collections are projected from every open installment of the
+submitted Payment Plans. Each installment's pending amount (penalties
+included) is spread over the dates it is likely to be paid on, using a
+lateness curve learned from payment history: the share of past installments
+paid on time, 1-30 days late, and so on, or never collected.
+
+The history is rebuilt from `tabFinanced Payment Ref` by replaying each plan's
+payments over its down payment and installments in order, the same allocation
+the plans use, so the curve does not depend on how installments reference
+their payments.
+
+Installments and payments are each read in one query; the forecast is built
+once a day by the scheduler and served from the cache.
+"""
+
+from datetime import timedelta
+
+import frappe
+from frappe.utils import add_days, date_diff, get_first_day, getdate, today
+
+from financed_sales.financed_sales.amortization import from_cents, to_cents
+
+FORECAST_CACHE_KEY = "financed_sales:cash_flow_forecast"
+FORECAST_CACHE_TTL = 24 * 60 * 60
+PERIODICITIES = ("Weekly", "Monthly")
+
+# Lateness buckets as (first day late, last day late, days late assumed for forecasting)
+LATENESS_BUCKETS = ((0, 0, 0), (1, 30, 15), (31, 60, 45), (61, 90, 75), (91, 180, 135))
+# Installments still unpaid this many days after their due date count as never collected
+UNCOLLECTED_AFTER_DAYS = LATENESS_BUCKETS[-1][1]
+# Used until there is payment history: everything is paid on time
+DEFAULT_CURVE = (1.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+def get_forecast(refresh=False):
+	"""Return today's forecast, building it if the cached one is missing or stale.
+
+	Returns:
+		dict: as_of, curve (share per lateness bucket, then uncollected) and one list
+			of rows per periodicity. Rows have company, period_start, scheduled_amount,
+			expected_amount, expected_penalties and installments.
+	"""
+	forecast = None if refresh else frappe.cache().get_value(FORECAST_CACHE_KEY)
+	if not forecast or forecast["as_of"] != today():
+		forecast = build_forecast_cache()
+	return forecast
+
+
+def build_forecast_cache():
+	"""Scheduled job: compute today's forecast and cache it."""
+	forecast = build_forecast()
+	frappe.cache().set_value(FORECAST_CACHE_KEY, forecast, expires_in_sec=FORECAST_CACHE_TTL)
+	return forecast
+
+
+def build_forecast(as_of=None):
+	"""Compute the forecast from the current installments and payment history."""
+	as_of = getdate(as_of or today())
+	installments_by_plan, down_payments = _get_installments()
+	payments_by_plan = _get_payment_history()
+
+	curve = get_lateness_curve(installments_by_plan, down_payments, payments_by_plan, as_of)
+	open_installments = [
+		installment
+		for installments in installments_by_plan.values()
+		for installment in installments
+		if installment.pending_amount > 0
+	]
+
+	return {
+		"as_of": str(as_of),
+		"curve": list(curve),
+		**{
+			periodicity: forecast_inflows(open_installments, curve, periodicity, as_of)
+			for periodicity in PERIODICITIES
+		},
+	}
+
+
+def get_lateness_curve(installments_by_plan, down_payments, payments_by_plan, as_of):
+	"""Share of installment amounts paid in each lateness bucket, plus the uncollected share.
+
+	Installments that are unpaid but not yet past `UNCOLLECTED_AFTER_DAYS` have no
+	outcome yet and are left out.
+	"""
+	weights = [0] * (len(LATENESS_BUCKETS) + 1)
+	for plan, installments in installments_by_plan.items():
+		settled_on = get_settlement_dates(
+			down_payments.get(plan, 0), installments, payments_by_plan.get(plan, [])
+		)
+		for installment, settled_date in zip(installments, settled_on, strict=True):
+			amount = to_cents(installment.amount)
+			if settled_date:
+				weights[get_lateness_bucket(date_diff(settled_date, installment.due_date))] += amount
+			elif date_diff(as_of, installment.due_date) > UNCOLLECTED_AFTER_DAYS:
+				weights[-1] += amount
+
+	total = sum(weights)
+	if not total:
+		return DEFAULT_CURVE
+	return tuple(weight / total for weight in weights)
+
+
+def get_settlement_dates(down_payment, installments, payments):
+	"""Replay payments in date order and return the date each installment was fully paid.
+
+	The down payment is settled first, then installments in order, each owing its
+	amount plus its penalty.
+
+	Returns:
+		list: One date per installment, None for installments not fully paid.
+	"""
+	owed = to_cents(down_payment)
+	settled_on = []
+	payments = iter(payments)
+	paid = 0
+	payment_date = None
+	for installment in installments:
+		owed += to_cents(installment.amount + (installment.penalty_amount or 0))
+		while paid < owed:
+			payment = next(payments, None)
+			if not payment:
+				break
+			paid += to_cents(payment.amount)
+			payment_date = payment.date
+		settled_on.append(payment_date if paid >= owed else None)
+	return settled_on
+
+
+def get_lateness_bucket(days_late):
+	for idx, (_first_day, last_day, _assumed) in enumerate(LATENESS_BUCKETS):
+		if days_late <= last_day:
+			return idx
+	return len(LATENESS_BUCKETS) - 1
+
+
+def forecast_inflows(open_installments, curve, periodicity, as_of):
+	"""Spread open installments over expected payment dates and sum them per company and period.
+
+	An installment already overdue can only fall in buckets it has not outgrown,
+	so the curve is renormalized over those (and the uncollected share).
+	Expected dates earlier than `as_of` are moved to `as_of`.
+
+	Returns:
+		list: Rows sorted by company and period_start.
+	"""
+	period_starts = {}
+	totals = {}
+
+	def add(company, date, scheduled=0, expected=0, penalties=0, installments=0):
+		# many installments share due dates, so each distinct date is bucketed once
+		if date not in period_starts:
+			period_starts[date] = get_period_start(date, periodicity)
+		row = totals.setdefault(
+			(company or "", period_starts[date]),
+			{"scheduled_amount": 0, "expected_amount": 0, "expected_penalties": 0, "installments": 0},
+		)
+		row["scheduled_amount"] += scheduled
+		row["expected_amount"] += expected
+		row["expected_penalties"] += penalties
+		row["installments"] += installments
+
+	for installment in open_installments:
+		due_date = getdate(installment.due_date)
+		pending = to_cents(installment.pending_amount)
+		penalty = min(to_cents(installment.penalty_amount or 0), pending)
+		add(installment.company, max(due_date, as_of), scheduled=pending, installments=1)
+
+		days_overdue = max(date_diff(as_of, due_date), 0)
+		# the curve's last share (uncollected) has no bucket and is added separately
+		possible = [
+			(share, assumed)
+			for share, (_first_day, last_day, assumed) in zip(curve, LATENESS_BUCKETS, strict=False)
+			if last_day >= days_overdue
+		]
+		remaining = sum(share for share, _assumed in possible) + curve[-1]
+		if not remaining:
+			continue
+
+		for share, assumed in possible:
+			if share:
+				weight = share / remaining
+				expected_date = max(due_date + timedelta(days=assumed), as_of)
+				add(installment.company, expected_date, expected=pending * weight, penalties=penalty * weight)
+
+	return [
+		{
+			"company": company,
+			"period_start": str(period_start),
+			"period_end": str(get_period_end(period_start, periodicity)),
+			"scheduled_amount": from_cents(row["scheduled_amount"]),
+			"expected_amount": from_cents(round(row["expected_amount"])),
+			"expected_penalties": from_cents(round(row["expected_penalties"])),
+			"installments": row["installments"],
+		}
+		for (company, period_start), row in sorted(totals.items())
+	]
+
+
+def get_period_start(date, periodicity):
+	if periodicity == "Weekly":
+		return date - timedelta(days=date.weekday())
+	return get_first_day(date)
+
+
+def get_period_end(period_start, periodicity):
+	if periodicity == "Weekly":
+		return add_days(period_start, 6)
+	return add_days(get_first_day(period_start, d_months=1), -1)
+
+
+def _get_installments():
+	"""Every installment of the submitted Payment Plans with its company, grouped by plan in order."""
+	rows = frappe.db.sql(
+		"""
+		SELECT
+			ppi.parent AS payment_plan,
+			ppi.due_date,
+			ppi.amount,
+			ppi.penalty_amount,
+			ppi.pending_amount,
+			pp.down_payment_amount,
+			si.company
+		FROM `tabPayment Plan Installment` ppi
+		INNER JOIN `tabPayment Plan` pp ON pp.name = ppi.parent
+		LEFT JOIN `tabSales Invoice` si ON si.name = pp.credit_invoice
+		WHERE ppi.parenttype = 'Payment Plan'
+		AND pp.docstatus = 1
+		ORDER BY ppi.parent, ppi.idx
+		""",
+		as_dict=True,
+	)
+
+	installments_by_plan = {}
+	down_payments = {}
+	for row in rows:
+		installments_by_plan.setdefault(row.payment_plan, []).append(row)
+		down_payments[row.payment_plan] = row.down_payment_amount or 0
+	return installments_by_plan, down_payments
+
+
+def _get_payment_history():
+	"""Payments of the submitted Payment Plans grouped by plan in date order."""
+	rows = frappe.db.sql(
+		"""
+		SELECT fpr.parent AS payment_plan, fpr.date, fpr.amount
+		FROM `tabFinanced Payment Ref` fpr
+		INNER JOIN `tabPayment Plan` pp ON pp.name = fpr.parent
+		WHERE fpr.parenttype = 'Payment Plan'
+		AND pp.docstatus = 1
+		ORDER BY fpr.parent, fpr.date, fpr.idx
+		""",
+		as_dict=True,
+	)
+
+	payments_by_plan = {}
+	for row in rows:
+		payments_by_plan.setdefault(row.payment_plan, []).append(row)
+	return payments_by_plan
@@ -0,0 +1,216 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+"""Prioritized collections worklist.
+
+Every overdue Payment Plan gets a priority score from the overdue aggregates
+(amount at risk, days overdue) and its collection fields (promise to pay, last
+contact). Scores live in one Redis sorted set per collector, so the next best
+account is a O(log n) lookup and a changed plan is re-scored on its own instead
+of re-sorting the whole portfolio.
+"""
+
+import math
+
+import frappe
+from frappe import _
+from frappe.utils import cint, date_diff, getdate, today
+
+from financed_sales.financed_sales.page.overdue_financed_sales.overdue_financed_sales import (
+	query_overdue_rows,
+)
+from financed_sales.financed_sales.utils import get_cached_hash
+
+# Sorted set per collector: payment plan -> score
+WORKLIST_KEY = "financed_sales:worklist"
+# Hash: payment plan -> collector whose sorted set holds it, plus the build date
+WORKLIST_OWNERS_KEY = "financed_sales:worklist_owners"
+# Hash: payment plans waiting to be re-scored
+WORKLIST_DIRTY_KEY = "financed_sales:worklist_dirty"
+AS_OF_FIELD = "__as_of__"
+UNASSIGNED = "__unassigned__"
+
+# Score weights
+AMOUNT_WEIGHT = 10
+DAYS_OVERDUE_WEIGHT = 5
+MAX_DAYS_OVERDUE = 180
+BROKEN_PROMISE_BONUS = 15
+PENDING_PROMISE_DISCOUNT = 40
+RECENT_CONTACT_PENALTY = 30
+RECENT_CONTACT_DAYS = 7
+
+
+def score_plan(overdue_amount, days_overdue, promise_to_pay_date=None, last_contact_date=None, as_of=None):
+	"""Compute the collection priority of an overdue Payment Plan.
+
+	- Amount at risk adds on a log scale so very large plans do not drown out the rest.
+	- Days overdue add linearly up to `MAX_DAYS_OVERDUE`.
+	- A broken promise to pay raises the score; a promise still in the future lowers it.
+	- A contact in the last `RECENT_CONTACT_DAYS` days lowers the score, fading out over that window.
+
+	Returns:
+		float: Higher means the account should be worked first.
+	"""
+	as_of = getdate(as_of or today())
+	score = AMOUNT_WEIGHT * math.log10(1 + max(overdue_amount or 0, 0))
+	score += DAYS_OVERDUE_WEIGHT * min(max(days_overdue or 0, 0), MAX_DAYS_OVERDUE) / 30
+
+	if promise_to_pay_date:
+		if getdate(promise_to_pay_date) >= as_of:
+			score -= PENDING_PROMISE_DISCOUNT
+		else:
+			score += BROKEN_PROMISE_BONUS
+
+	if last_contact_date:
+		days_since_contact = date_diff(as_of, last_contact_date)
+		if days_since_contact < RECENT_CONTACT_DAYS:
+			score -= RECENT_CONTACT_PENALTY * (RECENT_CONTACT_DAYS - days_since_contact) / RECENT_CONTACT_DAYS
+
+	return round(score, 4)
+
+
+@frappe.whitelist()
+def get_worklist(collector=None, limit=20):
+	"""Return the collector's top `limit` overdue accounts, best first."""
+	collector = collector or frappe.session.user
+	_sync_worklist()
+
+	cache = frappe.cache()
+	entries = cache.zrevrange(_get_worklist_key(collector), 0, cint(limit) - 1, withscores=True)
+	return _get_account_details([(_decode(plan), score) for plan, score in entries])
+
+
+@frappe.whitelist()
+def get_next_account(collector=None):
+	"""Return the collector's best account, falling back to unassigned plans."""
+	collector = collector or frappe.session.user
+	_sync_worklist()
+
+	cache = frappe.cache()
+	for owner in (collector, UNASSIGNED):
+		entries = cache.zrevrange(_get_worklist_key(owner), 0, 0, withscores=True)
+		if entries:
+			plan, score = entries[0]
+			return _get_account_details([(_decode(plan), score)])[0]
+
+	return None
+
+
+@frappe.whitelist()
+def log_collection_contact(payment_plan, promise_to_pay_date=None):
+	"""Record a contact with the customer (and an optional promise to pay) and re-score the plan."""
+	if not frappe.has_permission("Payment Plan", "write", payment_plan):
+		frappe.throw(
+			_("Not permitted to update Payment Plan {0}").format(payment_plan), frappe.PermissionError
+		)
+
+	frappe.db.set_value(
+		"Payment Plan",
+		payment_plan,
+		{"last_contact_date": today(), "promise_to_pay_date": promise_to_pay_date or None},
+	)
+	mark_worklist_dirty(payment_plan)
+
+
+def mark_worklist_dirty(payment_plan):
+	"""Queue a Payment Plan to be re-scored on the next worklist read."""
+	frappe.cache().hset(WORKLIST_DIRTY_KEY, payment_plan, 1)
+
+
+def rebuild_worklist():
+	"""Score every overdue Payment Plan and rebuild all collectors' sorted sets."""
+	cache = frappe.cache()
+	owners = get_cached_hash(WORKLIST_OWNERS_KEY)
+	owners.pop(AS_OF_FIELD, None)
+	for collector in set(owners.values()):
+		cache.delete(_get_worklist_key(collector))
+	cache.delete_key(WORKLIST_OWNERS_KEY)
+	cache.delete_key(WORKLIST_DIRTY_KEY)
+
+	_score_plans(query_overdue_rows())
+	cache.hset(WORKLIST_OWNERS_KEY, AS_OF_FIELD, today())
+
+
+def _sync_worklist():
+	"""Rebuild the worklist once a day and re-score plans changed since the last read."""
+	cache = frappe.cache()
+	if cache.hget(WORKLIST_OWNERS_KEY, AS_OF_FIELD) != today():
+		rebuild_worklist()
+		return
+
+	dirty_plans = list(get_cached_hash(WORKLIST_DIRTY_KEY))
+	if not dirty_plans:
+		return
+
+	for plan in dirty_plans:
+		cache.hdel(WORKLIST_DIRTY_KEY, plan)
+		owner = cache.hget(WORKLIST_OWNERS_KEY, plan)
+		if owner:
+			cache.zrem(_get_worklist_key(owner), plan)
+			cache.hdel(WORKLIST_OWNERS_KEY, plan)
+
+	_score_plans(query_overdue_rows(dirty_plans))
+
+
+def _score_plans(overdue_rows):
+	if not overdue_rows:
+		return
+
+	cache = frappe.cache()
+	as_of = today()
+	collection_fields = {
+		plan.name: plan
+		for plan in frappe.get_all(
+			"Payment Plan",
+			filters={"name": ["in", list(overdue_rows)]},
+			fields=["name", "collector", "promise_to_pay_date", "last_contact_date"],
+		)
+	}
+
+	scores_by_owner = {}
+	for plan_name, row in overdue_rows.items():
+		fields = collection_fields.get(plan_name) or frappe._dict()
+		owner = fields.collector or UNASSIGNED
+		scores_by_owner.setdefault(owner, {})[plan_name] = score_plan(
+			row["overdue_amount"],
+			date_diff(as_of, row["oldest_due_date"]),
+			fields.promise_to_pay_date,
+			fields.last_contact_date,
+			as_of,
+		)
+		cache.hset(WORKLIST_OWNERS_KEY, plan_name, owner)
+
+	for owner, scores in scores_by_owner.items():
+		cache.zadd(_get_worklist_key(owner), scores)
+
+
+def _get_account_details(entries):
+	if not entries:
+		return []
+
+	rows = query_overdue_rows([plan for plan, _score in entries])
+	as_of = today()
+	accounts = []
+	for plan, score in entries:
+		row = rows.get(plan)
+		if not row:
+			continue
+		accounts.append(
+			{
+				"payment_plan": plan,
+				"customer": row["customer"],
+				"overdue_amount": row["overdue_amount"],
+				"days_overdue": date_diff(as_of, row["oldest_due_date"]),
+				"score": score,
+			}
+		)
+	return accounts
+
+
+def _get_worklist_key(collector):
+	# Sorted set commands go straight to redis, so apply the site prefix here
+	return frappe.cache().make_key(f"{WORKLIST_KEY}:{collector}")
+
+
+def _decode(value):
+	return value.decode() if isinstance(value, bytes) else value
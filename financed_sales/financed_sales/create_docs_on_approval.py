@@ -3,18 +3,100 @@ from frappe import _
 from erpnext.selling.doctype.quotation.quotation import make_sales_order
 from erpnext.selling.doctype.sales_order.sales_order import make_sales_invoice
 from financed_sales.financed_sales.utils import distribute_interest_to_items 
+from financed_sales.financed_sales.update_payments import to_cents
+from financed_sales.financed_sales.doctype.customer_exposure.customer_exposure import update_customer_exposure
+from financed_sales.financed_sales.doctype.financed_sales_settings.financed_sales_settings import get_settings
+
+APPROVAL_IN_PROGRESS = ('Queued', 'Processing')
+
 
 def main(doc,method):
 	if doc.workflow_state == 'Approved' and not doc.credit_invoice:
-		on_approval(doc)
+		if doc.approval_status not in APPROVAL_IN_PROGRESS:
+			enqueue_approval(doc)
 	elif doc.workflow_state == 'Pending' and not doc.sales_order:
 		create_sales_order(doc)
-	
-	
-	
+
+
+def enqueue_approval(doc, now=False):
+	"""Queue creation of the credit invoice and Payment Plan for an approved application.
+
+	The application's `approval_status` tracks the job (Queued, Processing,
+	Completed, Failed) and the form is notified through the
+	`finance_application_approval` realtime event when it finishes.
+
+	Args:
+		doc: Approved Finance Application.
+		now (bool): Run the job in the current request/job instead of queueing it.
+			Bulk approval chunks always run it inline.
+	"""
+	now = now or frappe.flags.in_bulk_approval
+	doc.approval_status = 'Queued'
+	frappe.db.set_value(doc.doctype, doc.name, 'approval_status', 'Queued')
+	frappe.enqueue(
+		'financed_sales.financed_sales.create_docs_on_approval.process_approval',
+		queue='long',
+		job_id=f'finance_application_approval::{doc.name}',
+		deduplicate=not now,
+		enqueue_after_commit=True,
+		now=now,
+		finance_application=doc.name,
+	)
+
+
+@frappe.whitelist()
+def retry_approval(finance_application):
+	"""Re-queue a Finance Application whose approval job failed."""
+	doc = frappe.get_doc('Finance Application', finance_application)
+	doc.check_permission('write')
+	if doc.workflow_state != 'Approved' or doc.credit_invoice or doc.approval_status in APPROVAL_IN_PROGRESS:
+		frappe.throw(_('Finance Application {0} is not waiting for approval documents').format(doc.name))
+
+	enqueue_approval(doc)
+
+
+def process_approval(finance_application):
+	"""Background job: create the approval documents, recording failures on the application."""
+	doc = frappe.get_doc('Finance Application', finance_application)
+	if doc.workflow_state != 'Approved' or doc.credit_invoice:
+		return
+
+	frappe.db.set_value(doc.doctype, doc.name, 'approval_status', 'Processing')
+	frappe.db.savepoint('finance_application_approval')
+	try:
+		on_approval(doc)
+	except Exception:
+		frappe.db.rollback(save_point='finance_application_approval')
+		frappe.db.set_value(doc.doctype, doc.name, 'approval_status', 'Failed')
+		frappe.log_error(
+			title=_('Finance Application approval failed'),
+			reference_doctype=doc.doctype,
+			reference_name=doc.name,
+		)
+		notify_approval(doc, 'Failed')
+		return
+
+	notify_approval(doc, 'Completed')
+
+
+def notify_approval(doc, status):
+	frappe.publish_realtime(
+		'finance_application_approval',
+		{
+			'name': doc.name,
+			'status': status,
+			'credit_invoice': doc.credit_invoice,
+			'payment_plan': doc.payment_plan,
+		},
+		doctype=doc.doctype,
+		docname=doc.name,
+		after_commit=True,
+	)
+
+
 def create_sales_order(doc):
 	sales_order_dict = make_sales_order(doc.quotation)
-	settings = frappe.get_single('Financed Sales Settings')
+	settings = get_settings()
 
 	# The method returns a dictionary, convert to doc and save
 	sales_order = frappe.get_doc(sales_order_dict)
@@ -49,22 +131,28 @@ def create_sales_order(doc):
 
 def on_approval(doc):
 	"""Creates corresponding (credit) Sales Invoice and Payment Plan"""
-	inv_name = create_credit_inv(doc)				#Create the credit inv and put the link in the application                              	
-	doc.credit_invoice = inv_name						#Note: this does not add the link to the database as the application is already submited)	
-																#In the next line the value is acctually inserted in the DB                             	
-	frappe.db.set_value(doc.doctype,doc.name,'credit_invoice',inv_name)
-	#same pattern:
+	inv_name = create_credit_inv(doc)
 	plan_name = create_payment_plan(doc, inv_name)
+
+	# The application is already submitted: write its back-links (and the
+	# approval status) straight to the DB in one update, same for the invoice
+	doc.credit_invoice = inv_name
 	doc.payment_plan = plan_name
-	frappe.db.set_value(doc.doctype,doc.name,'payment_plan',plan_name)
-	
-	#add references to credit inv and payment plan:
-	frappe.db.set_value('Sales Invoice',inv_name,'custom_payment_plan',plan_name)
-	frappe.db.set_value('Sales Invoice',inv_name,'custom_finance_application',doc.name)
-	
-	
+	doc.approval_status = 'Completed'
+	frappe.db.set_value(doc.doctype, doc.name, {
+		'credit_invoice': inv_name,
+		'payment_plan': plan_name,
+		'approval_status': 'Completed',
+	})
+	frappe.db.set_value('Sales Invoice', inv_name, {
+		'custom_payment_plan': plan_name,
+		'custom_finance_application': doc.name,
+	})
+	update_customer_exposure(doc.customer)
+
+
 def create_credit_inv(doc, submit = True):
-	settings = frappe.get_single('Financed Sales Settings')
+	settings = get_settings()
 	account = settings.interests_account #account for interest
 	invoice = make_sales_invoice(doc.sales_order, ignore_permissions=True)
 	quotation = frappe.get_doc('Quotation', doc.quotation)
@@ -91,6 +179,13 @@ def create_credit_inv(doc, submit = True):
 	return invoice.name
 
 def create_payment_plan(doc, credit_invoice_name, submit = True):
+	"""Create the Payment Plan for an approved Finance Application.
+
+	The plan is inserted already submitted (one insert instead of insert + submit).
+	When the application's payments only
+	cover the down payment their allocation is known upfront and set directly,
+	so `before_submit` does not re-run the allocation.
+	"""
 	plan = frappe.new_doc('Payment Plan')
 	plan.finance_application = doc.name
 	plan.customer = doc.customer
@@ -98,22 +193,54 @@ def create_payment_plan(doc, credit_invoice_name, submit = True):
 	plan.down_payment_amount = doc.down_payment_amount
 	plan.paid_down_payment_amount = doc.paid_down_payment_amount
 	plan.pending_down_payment_amount = doc.pending_down_payment_amount
-	
-	for installment in doc.installments:
-		plan.append('installments',{
+
+	plan.set('installments', [
+		{
 			'due_date': installment.due_date,
 			'amount': installment.amount,
 			'paid_amount': 0,
 			'pending_amount': installment.amount,
-		})
+		}
+		for installment in doc.installments
+	])
 
 	#copy payments made against Finance Application:
-	for payment in doc.payment_refs:
-		plan.append('payment_refs',payment.as_dict())
-		
-		
+	plan.set('payment_refs', [
+		{'payment_entry': payment.payment_entry, 'amount': payment.amount, 'date': payment.date}
+		for payment in doc.payment_refs
+	])
 
-	plan.insert(ignore_permissions=True)
 	if submit:
-		plan.submit()
+		set_down_payment_allocation(plan)
+		plan.docstatus = 1
+
+	plan.insert(ignore_permissions=True)
 	return plan.name
+
+
+def set_down_payment_allocation(plan):
+	"""Allocate the plan's payments to the down payment when they do not exceed it.
+
+	Returns:
+		bool: True if the allocation was set and `before_submit` can skip it.
+	"""
+	paid_cents = sum(to_cents(payment.amount) for payment in plan.payment_refs)
+	if paid_cents > to_cents(plan.down_payment_amount):
+		return False
+
+	if len(plan.payment_refs) == 1:
+		plan.down_payment_ref_type = 'Payment Entry'
+		plan.down_payment_reference = plan.payment_refs[0].payment_entry
+	elif len(plan.payment_refs) > 1:
+		payment_entry_list = frappe.get_doc({
+			'doctype': 'Payment Entry List',
+			'refs': [
+				{'payment_entry': payment.payment_entry, 'paid_amount': payment.amount, 'date': payment.date}
+				for payment in plan.payment_refs
+			],
+		}).insert(ignore_permissions=True)
+		plan.down_payment_ref_type = 'Payment Entry List'
+		plan.down_payment_reference = payment_entry_list.name
+
+	plan.flags.allocation_precomputed = True
+	return True
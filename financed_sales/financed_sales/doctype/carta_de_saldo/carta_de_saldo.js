@@ -2,6 +2,21 @@
 // For license information, please see license.txt
 
 frappe.ui.form.on("Carta de Saldo", {
+	refresh: function (frm) {
+		if (frm.doc.docstatus !== 1) return;
+
+		frm.add_custom_button(__("Download PDF"), () => {
+			frappe.call({
+				method: "financed_sales.financed_sales.doctype.carta_de_saldo.carta_de_saldo.get_carta_de_saldo_pdf",
+				args: { name: frm.doc.name },
+				freeze: true,
+				callback: (r) => {
+					if (r.message) window.open(r.message);
+				},
+			});
+		});
+	},
+
 	payment_plan: function (frm) {
 		if (!frm.doc.payment_plan) return;
 
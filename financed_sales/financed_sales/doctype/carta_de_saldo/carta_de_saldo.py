@@ -4,7 +4,9 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import nowdate
+from frappe.utils import get_datetime, nowdate
+
+PAYMENT_PLAN_INDEX = "payment_plan_docstatus_index"
 
 
 class CartadeSaldo(Document):
@@ -15,9 +17,16 @@ class CartadeSaldo(Document):
 
 	if TYPE_CHECKING:
 		from frappe.types import DF
-		from financed_sales.financed_sales.doctype.carta_de_saldo_installment.carta_de_saldo_installment import CartadeSaldoInstallment
-		from financed_sales.financed_sales.doctype.carta_de_saldo_item.carta_de_saldo_item import CartadeSaldoItem
-		from financed_sales.financed_sales.doctype.carta_de_saldo_payment.carta_de_saldo_payment import CartadeSaldoPayment
+
+		from financed_sales.financed_sales.doctype.carta_de_saldo_installment.carta_de_saldo_installment import (
+			CartadeSaldoInstallment,
+		)
+		from financed_sales.financed_sales.doctype.carta_de_saldo_item.carta_de_saldo_item import (
+			CartadeSaldoItem,
+		)
+		from financed_sales.financed_sales.doctype.carta_de_saldo_payment.carta_de_saldo_payment import (
+			CartadeSaldoPayment,
+		)
 
 		amended_from: DF.Link | None
 		credit_invoice: DF.Link | None
@@ -44,7 +53,8 @@ class CartadeSaldo(Document):
 		if not self.payment_plan:
 			return
 
-		status = frappe.db.get_value("Payment Plan", self.payment_plan, "status")
+		# snapshot_from_payment_plan already read the status when inserting
+		status = self.flags.payment_plan_status or frappe.db.get_value("Payment Plan", self.payment_plan, "status")
 		if status != "Completed":
 			frappe.throw( _("No se puede crear una Carta de Saldo para Plan de Pago {0}. El estado del Planes '{1}', pero debe ser 'Completado'.").format(self.payment_plan, status), title=_("Plan No Completado"))
 
@@ -53,62 +63,79 @@ class CartadeSaldo(Document):
 		Snapshot installments and payment history from the linked Payment Plan.
 		This makes the Carta de Saldo an immutable record of what was paid
 		at the moment the letter was issued.
+
+		Only the needed columns are read, with one query per source table.
 		"""
 		if not self.payment_plan:
 			return
 
-		plan = frappe.get_doc("Payment Plan", self.payment_plan)
-
-		# Clear any existing rows
-		self.installments = []
-		self.payment_history = []
-		self.items = []
+		plan = frappe.db.get_value(
+			"Payment Plan",
+			self.payment_plan,
+			["customer", "finance_application", "credit_invoice", "total_paid", "status"],
+			as_dict=True,
+		)
+		if not plan:
+			return
+		self.flags.payment_plan_status = plan.status
 
 		# Snapshot items from Sales Invoice
+		items = []
 		if plan.credit_invoice:
-			invoice = frappe.get_doc("Sales Invoice", plan.credit_invoice)
-			for item in invoice.items:
-				self.append("items", {
-					"item_code": item.item_code,
-					"item_name": item.item_name,
-					"description": item.description,
-					"qty": item.qty,
-					"uom": item.uom,
-					"rate": item.rate,
-					"amount": item.amount
-				})
+			items = frappe.get_all(
+				"Sales Invoice Item",
+				filters={"parent": plan.credit_invoice, "parenttype": "Sales Invoice"},
+				fields=["item_code", "item_name", "description", "qty", "uom", "rate", "amount"],
+				order_by="idx",
+			)
+		self.set("items", items)
 
 		# Snapshot installments
-		for row in plan.installments:
-			self.append("installments", {
-				"due_date": row.due_date,
-				"amount": row.amount,
-				"paid_amount": row.paid_amount,
-				"pending_amount": row.pending_amount,
-				"payment_ref": row.payment_ref,
-				"penalty_amount": row.penalty_amount or 0,
-			})
+		installments = frappe.get_all(
+			"Payment Plan Installment",
+			filters={"parent": self.payment_plan, "parenttype": "Payment Plan"},
+			fields=["due_date", "amount", "paid_amount", "pending_amount", "payment_ref", "penalty_amount"],
+			order_by="idx",
+		)
+		for row in installments:
+			row.penalty_amount = row.penalty_amount or 0
+		self.set("installments", installments)
 
 		# Snapshot payment references (actual Payment Entries)
-		for row in plan.payment_refs:
-			self.append("payment_history", {
-				"payment_entry": row.payment_entry,
-				"amount": row.amount,
-				"date": row.date,
-			})
+		self.set(
+			"payment_history",
+			frappe.get_all(
+				"Financed Payment Ref",
+				filters={"parent": self.payment_plan, "parenttype": "Payment Plan"},
+				fields=["payment_entry", "amount", "date"],
+				order_by="idx",
+			),
+		)
 
 		# total_paid = sum of every actual payment made (includes down payment)
-		self.total_paid = sum(row.amount or 0 for row in plan.payment_refs)
+		self.total_paid = plan.total_paid or 0
 
-		# total_financed_amount = the original financed amount from the Finance Application
+		# Financed amount and Cedula (pasaporte_cedula) from the Finance Application and its form
+		application = None
 		if plan.finance_application:
-			fin_app_amount = frappe.db.get_value(
-				"Finance Application", plan.finance_application, "total_amount_to_finance"
+			application = frappe.db.sql(
+				"""
+				SELECT fa.total_amount_to_finance, faf.pasaporte_cedula
+				FROM `tabFinance Application` fa
+				LEFT JOIN `tabFinance Application Form` faf ON faf.name = fa.finance_application_form
+				WHERE fa.name = %s
+				""",
+				plan.finance_application,
+				as_dict=True,
 			)
-			self.total_financed_amount = fin_app_amount or 0
+			application = application[0] if application else None
+
+		# total_financed_amount = the original financed amount from the Finance Application
+		if application:
+			self.total_financed_amount = application.total_amount_to_finance or 0
 		else:
 			# Fallback: sum of installment amounts if no finance application linked
-			self.total_financed_amount = sum(row.amount or 0 for row in plan.installments)
+			self.total_financed_amount = sum(row.amount or 0 for row in installments)
 
 		# Carry over linked documents if not already set via fetch_from
 		if not self.customer:
@@ -118,10 +145,54 @@ class CartadeSaldo(Document):
 		if not self.credit_invoice:
 			self.credit_invoice = plan.credit_invoice
 
-		# Pull Cedula (pasaporte_cedula) from Finance Application Form if available
-		if plan.finance_application:
-			fin_app = frappe.get_doc("Finance Application", plan.finance_application)
-			if fin_app.finance_application_form:
-				cedula = frappe.db.get_value("Finance Application Form", fin_app.finance_application_form, "pasaporte_cedula")
-				if cedula:
-					self.customer_id = cedula
+		if application and application.pasaporte_cedula:
+			self.customer_id = application.pasaporte_cedula
+
+
+def on_doctype_update():
+	# Serves the anti-join that finds Completed plans without a submitted letter
+	frappe.db.add_index("Carta de Saldo", ["payment_plan", "docstatus"], PAYMENT_PLAN_INDEX)
+
+
+@frappe.whitelist()
+def get_carta_de_saldo_pdf(name):
+	"""Return the URL of the rendered PDF of a submitted Carta de Saldo.
+
+	The PDF is rendered once per document version (its `modified` timestamp) and
+	kept as a private File attached to the letter; reprints reuse that File.
+	"""
+	doc = frappe.get_doc("Carta de Saldo", name)
+	doc.check_permission("print")
+	if doc.docstatus != 1:
+		frappe.throw(_("Only submitted Cartas de Saldo can be printed"))
+
+	file_name = f"{doc.name}-{get_datetime(doc.modified):%Y%m%d%H%M%S%f}.pdf"
+	cached_files = frappe.get_all(
+		"File",
+		filters={
+			"attached_to_doctype": doc.doctype,
+			"attached_to_name": doc.name,
+			"file_name": ["like", f"{doc.name}-%.pdf"],
+		},
+		fields=["name", "file_name", "file_url"],
+	)
+	for cached in cached_files:
+		if cached.file_name == file_name:
+			return cached.file_url
+
+	# A newer version replaces older renders
+	for cached in cached_files:
+		frappe.delete_doc("File", cached.name, ignore_permissions=True)
+
+	pdf = frappe.get_print(doc.doctype, doc.name, doc=doc, as_pdf=True)
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"attached_to_doctype": doc.doctype,
+			"attached_to_name": doc.name,
+			"is_private": 1,
+			"content": pdf,
+		}
+	).insert(ignore_permissions=True)
+	return file_doc.file_url
@@ -0,0 +1,52 @@
+// Copyright (c) 2025, Lewis Mojica and contributors
+// For license information, please see license.txt
+
+frappe.listview_settings["Carta de Saldo"] = {
+	onload: function (listview) {
+		listview.page.add_inner_button(__("Issue for Completed Plans"), () => {
+			const dialog = new frappe.ui.Dialog({
+				title: __("Issue Cartas de Saldo"),
+				fields: [
+					{
+						fieldname: "merge_pdf",
+						fieldtype: "Check",
+						label: __("Also render one merged PDF per company"),
+					},
+				],
+				primary_action_label: __("Issue"),
+				primary_action: (values) => {
+					frappe.call({
+						method: "financed_sales.financed_sales.carta_de_saldo_batch.issue_cartas_de_saldo",
+						args: { merge_pdf: values.merge_pdf },
+						callback: () => {
+							frappe.show_alert({
+								message: __("Cartas de Saldo are being issued in the background"),
+								indicator: "blue",
+							});
+						},
+					});
+					dialog.hide();
+				},
+			});
+			dialog.show();
+		});
+
+		frappe.realtime.off("carta_de_saldo_batch_ready");
+		frappe.realtime.on("carta_de_saldo_batch_ready", (data) => {
+			const failed = Object.keys(data.failed || {});
+			const links = Object.entries(data.files || {}).map(
+				([company, url]) => `<a href="${url}" target="_blank">${company || __("No Company")}</a>`
+			);
+			frappe.msgprint({
+				title: __("Cartas de Saldo Issued"),
+				indicator: failed.length ? "orange" : "green",
+				message: [
+					__("{0} Cartas de Saldo issued.", [data.issued]),
+					failed.length ? __("Failed for: {0}", [failed.join(", ")]) : "",
+					links.length ? __("Merged PDFs: {0}", [links.join(", ")]) : "",
+				].filter(Boolean).join("<br>"),
+			});
+			listview.refresh();
+		});
+	},
+};
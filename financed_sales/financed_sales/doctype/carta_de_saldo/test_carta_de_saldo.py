@@ -198,3 +198,47 @@ class TestCartaDeSaldo(FrappeTestCase):
 			len(carta.installments), installment_count,
 			"Installments should remain intact after submission",
 		)
+
+	def test_carta_de_saldo_pdf_is_cached_per_version(self):
+		"""
+		Reprinting an unchanged submitted Carta de Saldo should reuse the cached PDF File.
+		"""
+		from financed_sales.financed_sales.doctype.carta_de_saldo.carta_de_saldo import (
+			get_carta_de_saldo_pdf,
+		)
+
+		plan_name, _, _ = self._create_completed_payment_plan()
+		carta = frappe.get_doc({
+			"doctype": "Carta de Saldo",
+			"payment_plan": plan_name,
+			"issue_date": today(),
+		})
+		carta.insert(ignore_permissions=True)
+		carta.submit()
+
+		first_url = get_carta_de_saldo_pdf(carta.name)
+		second_url = get_carta_de_saldo_pdf(carta.name)
+
+		self.assertEqual(first_url, second_url)
+		self.assertEqual(
+			frappe.db.count("File", {"attached_to_doctype": "Carta de Saldo", "attached_to_name": carta.name}),
+			1,
+		)
+
+	def test_batch_issues_letters_for_completed_plans(self):
+		"""
+		The batch job should issue a submitted Carta de Saldo for every Completed plan without one.
+		"""
+		from financed_sales.financed_sales.carta_de_saldo_batch import (
+			get_plans_without_carta,
+			run_carta_de_saldo_batch,
+		)
+
+		plan_name, _, _ = self._create_completed_payment_plan()
+		self.assertIn(plan_name, [row.payment_plan for row in get_plans_without_carta()])
+
+		result = run_carta_de_saldo_batch()
+
+		self.assertNotIn(plan_name, result["failed"])
+		self.assertTrue(frappe.db.exists("Carta de Saldo", {"payment_plan": plan_name, "docstatus": 1}))
+		self.assertNotIn(plan_name, [row.payment_plan for row in get_plans_without_carta()])
@@ -0,0 +1,8 @@
+// Copyright (c) 2025, Lewis Mojica and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Customer Exposure", {
+// 	refresh(frm) {
+
+// 	},
+// });
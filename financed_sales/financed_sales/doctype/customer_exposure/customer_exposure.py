@@ -0,0 +1,70 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, date_diff, today
+
+from financed_sales.financed_sales.portfolio_snapshot import get_snapshot_rows
+
+EXPOSURE_FIELDS = ("open_plans", "outstanding_amount", "overdue_amount", "oldest_overdue_date")
+
+
+class CustomerExposure(Document):
+	pass
+
+
+def update_customer_exposure(customer):
+	"""Recompute a customer's exposure from their open Payment Plans.
+
+	Called whenever one of the customer's plans changes (payments, cancelled
+	payments, penalties, approvals, cancelled plans), so the record is kept
+	current without scanning the whole portfolio.
+	"""
+	if not customer:
+		return
+
+	rows = get_snapshot_rows(today(), customer=customer)
+	overdue_dates = [add_days(today(), -row["days_overdue"]) for row in rows if row["days_overdue"] > 0]
+	values = {
+		"open_plans": len(rows),
+		"outstanding_amount": sum(row["outstanding_amount"] for row in rows),
+		"overdue_amount": sum(row["overdue_amount"] for row in rows),
+		"oldest_overdue_date": min(overdue_dates) if overdue_dates else None,
+	}
+
+	if frappe.db.exists("Customer Exposure", customer):
+		frappe.db.set_value("Customer Exposure", customer, values)
+		return
+
+	try:
+		frappe.get_doc({"doctype": "Customer Exposure", "customer": customer, **values}).insert(
+			ignore_permissions=True
+		)
+	except frappe.DuplicateEntryError:
+		# created by a concurrent update since the check above
+		frappe.db.set_value("Customer Exposure", customer, values)
+
+
+def update_plan_customer_exposure(payment_plan):
+	"""Recompute the exposure of the customer owning `payment_plan`."""
+	update_customer_exposure(frappe.db.get_value("Payment Plan", payment_plan, "customer"))
+
+
+@frappe.whitelist()
+def get_customer_exposure(customer):
+	"""Return a customer's exposure on their open Payment Plans with one primary key lookup.
+
+	Returns:
+		dict: open_plans, outstanding_amount, overdue_amount, oldest_overdue_date and
+			worst_days_overdue, or None if the customer has never had a Payment Plan.
+	"""
+	frappe.has_permission("Customer Exposure", "read", throw=True)
+	exposure = frappe.db.get_value("Customer Exposure", customer, EXPOSURE_FIELDS, as_dict=True)
+	if not exposure:
+		return None
+
+	exposure.worst_days_overdue = (
+		date_diff(today(), exposure.oldest_overdue_date) if exposure.oldest_overdue_date else 0
+	)
+	return exposure
@@ -0,0 +1,46 @@
+# Copyright (c) 2025, Lewis Mojica and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from financed_sales.financed_sales.api import create_payment_entry_from_payment_plan
+from financed_sales.financed_sales.doctype.customer_exposure.customer_exposure import (
+	get_customer_exposure,
+	update_customer_exposure,
+)
+from financed_sales.financed_sales.factories.payment_plan.overdue import create_overdue_payment_plan
+from financed_sales.financed_sales.factories.payment_plan_factory import (
+	create_test_payment_plan_for_payment_entry,
+)
+
+
+class TestCustomerExposure(FrappeTestCase):
+	def test_exposure_includes_overdue_plan(self):
+		"""An overdue plan adds to the customer's outstanding and overdue amounts"""
+		result = create_overdue_payment_plan()
+		customer = frappe.db.get_value("Payment Plan", result["payment_plan"], "customer")
+
+		update_customer_exposure(customer)
+		exposure = get_customer_exposure(customer)
+
+		self.assertGreaterEqual(exposure.open_plans, 1)
+		self.assertGreater(exposure.outstanding_amount, 0)
+		self.assertGreater(exposure.overdue_amount, 0)
+		self.assertGreaterEqual(exposure.worst_days_overdue, 60)
+
+	def test_payment_updates_exposure(self):
+		"""Posting a payment lowers the customer's outstanding amount"""
+		test_data = create_test_payment_plan_for_payment_entry()
+		customer = frappe.db.get_value("Payment Plan", test_data["payment_plan"], "customer")
+		update_customer_exposure(customer)
+		before = get_customer_exposure(customer).outstanding_amount
+
+		create_payment_entry_from_payment_plan(
+			payment_plan_name=test_data["payment_plan"],
+			paid_amount=1000,
+			mode_of_payment=test_data["mode_of_payment"],
+			submit=True,
+		)
+
+		self.assertEqual(get_customer_exposure(customer).outstanding_amount, before - 1000)
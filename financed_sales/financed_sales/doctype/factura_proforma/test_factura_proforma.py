@@ -1,9 +1,28 @@
 # Copyright (c) 2025, Lewis Mojica and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
 
 class TestFacturaProforma(FrappeTestCase):
-	pass
+	def test_factura_proforma_items_include_interest(self):
+		"""Proforma rows should carry every quotation item with the interest distributed"""
+		from financed_sales.financed_sales.factories.payment_plan.with_factura import (
+			create_payment_plan_with_factura,
+		)
+
+		result = create_payment_plan_with_factura()
+		factura = frappe.get_doc("Factura Proforma", result["factura_proforma"])
+		finance_application = frappe.get_doc("Finance Application", result["finance_application"])
+		quotation_items = frappe.get_all(
+			"Quotation Item", filters={"parent": finance_application.quotation}, pluck="item_code"
+		)
+
+		self.assertEqual(sorted(row.item_code for row in factura.items), sorted(quotation_items))
+		self.assertTrue(all(row.item_name and row.uom for row in factura.items))
+		self.assertAlmostEqual(
+			sum(row.amount for row in factura.items),
+			frappe.db.get_value("Quotation", finance_application.quotation, "total") + finance_application.interests,
+			places=2,
+		)
@@ -80,8 +80,8 @@ return new frappe.ui.Dialog({
                                      const dialog = window.cur_dialog;
                                     
                                      if (mode_of_payment) {
-                                         frappe.db.get_value('Mode of Payment', mode_of_payment, 'type').then(r => {
-                                             if (r.message && r.message.type === 'Bank') {
+                                         get_mode_of_payment_type(mode_of_payment).then(type => {
+                                             if (type === 'Bank') {
                                                  dialog.set_df_property('reference_number', 'hidden', false);
                                                  dialog.set_df_property('reference_date', 'hidden', false);
                                              } else {
@@ -129,6 +129,8 @@ return new frappe.ui.Dialog({
 }
 
 function show_confirmation_dialog(payment_values, source_name, source_type) {
+	// One key per confirmation, so a retried submission cannot post the payment twice
+	const idempotency_key = frappe.utils.get_random(20);
 	const confirmation_dialog = new frappe.ui.Dialog({
 		title: 'Confirm Payment Submission',
 		fields: [
@@ -153,7 +155,7 @@ function show_confirmation_dialog(payment_values, source_name, source_type) {
 		size: 'small',
 		primary_action_label: 'Confirm & Submit Payment',
 		primary_action() {
-			submit_payment(payment_values, source_name, source_type);
+			submit_payment(payment_values, source_name, source_type, idempotency_key);
 			confirmation_dialog.hide();
 		},
 		secondary_action_label: 'Cancel',
@@ -165,11 +167,12 @@ function show_confirmation_dialog(payment_values, source_name, source_type) {
 	confirmation_dialog.show();
 }
 
-function submit_payment(payment_values, source_name, source_type) {
+function submit_payment(payment_values, source_name, source_type, idempotency_key) {
 	const args = {
 		paid_amount: payment_values.paid_amount,
 		mode_of_payment: payment_values.mode_of_payment,
-		submit: true
+		submit: true,
+		idempotency_key: idempotency_key
 	};
 	
 	if (source_type === 'Finance Application') {
@@ -179,8 +182,8 @@ function submit_payment(payment_values, source_name, source_type) {
 	}
 	
 	// Check payment method type to determine if reference fields are needed
-	frappe.db.get_value('Mode of Payment', payment_values.mode_of_payment, 'type').then(r => {
-		if (r.message && r.message.type === 'Bank') {
+	get_mode_of_payment_type(payment_values.mode_of_payment).then(type => {
+		if (type === 'Bank') {
 			args.reference_number = payment_values.reference_number;
 			args.reference_date = payment_values.reference_date;
 		}
@@ -193,7 +196,13 @@ function submit_payment(payment_values, source_name, source_type) {
 		method: method_name,
 		args: args,
 		callback: function(response) {
-			if (response.message) {
+			if (response.message && response.message.status) {
+				// The same payment is still being processed by an earlier request
+				frappe.show_alert({
+					message: __('Payment is being processed, please check again shortly'),
+					indicator: 'orange'
+				});
+			} else if (response.message) {
 				frappe.show_alert({
 					message: __('Payment Entry created successfully'),
 					indicator: 'green'
@@ -219,3 +228,12 @@ function submit_payment(payment_values, source_name, source_type) {
 		});
 	});
 }
+
+function get_mode_of_payment_type(mode_of_payment) {
+	// Mode of Payment details are sent once per session in the boot info
+	const modes = frappe.boot.financed_sales_modes_of_payment || {};
+	if (modes[mode_of_payment]) {
+		return Promise.resolve(modes[mode_of_payment].type);
+	}
+	return frappe.db.get_value('Mode of Payment', mode_of_payment, 'type').then(r => r.message && r.message.type);
+}
@@ -5,6 +5,7 @@ import frappe
 from frappe import _
 from frappe.model.document import Document
 from financed_sales.financed_sales.utils import distribute_interest_to_items
+from financed_sales.financed_sales.doctype.customer_exposure.customer_exposure import get_customer_exposure
 
 
 class FinanceApplication(Document):
@@ -19,6 +20,11 @@ class FinanceApplication(Document):
 		finance_application_form: DF.Link | None
 	# end: auto-generated types
 
+	def onload(self):
+		"""Send the customer's exposure on their open Payment Plans to the form"""
+		if self.customer and frappe.has_permission("Customer Exposure", "read"):
+			self.set_onload("customer_exposure", get_customer_exposure(self.customer))
+
 	def validate(self):
 		if len(self.installments) <= 0 and self.docstatus == 1:
 			frappe.throw(_('Not enough data to compute installments'))
@@ -159,25 +165,34 @@ class FinanceApplication(Document):
 	@frappe.whitelist()
 	def create_factura_proforma(self):
 		sub_total = 0
-		discount = 0
-		delivery_fee = 0
-		itbis = 0
-		grand_total = 0
-		credit_total = 0
-		quotation = frappe.get_doc('Quotation', self.quotation)
+		# Only the item columns used for the interest distribution, in one query
+		quotation_items = frappe.get_all('Quotation Item',
+			filters={'parent': self.quotation, 'parenttype': 'Quotation'},
+			fields=['item_code', 'item_name', 'qty', 'uom', 'conversion_factor', 'rate', 'amount'],
+			order_by='idx')
 		
 		factura = frappe.new_doc('Factura Proforma')
 		factura.finance_application = self.name
 		factura.customer = self.customer
 
 
-		financed_items = distribute_interest_to_items(quotation.items, self.interests)
+		financed_items = distribute_interest_to_items(quotation_items, self.interests)
+
+		# Item master data is only needed for rows missing a name or UOM
+		missing = {item['item_code'] for item in financed_items if not (item['item_name'] and item['uom'])}
+		item_details = {
+			item.name: item
+			for item in frappe.get_all('Item',
+				filters={'name': ['in', list(missing)]},
+				fields=['name', 'item_name', 'stock_uom'])
+		} if missing else {}
 		
+		rows = []
 		for item in financed_items:
-			item_doc = frappe.get_doc("Item", item['item_code'])
+			item_doc = item_details.get(item['item_code']) or frappe._dict()
 			sub_total += item['amount']
 			
-			factura.append('items', {
+			rows.append({
 				'item_code': item['item_code'],
 				'item_name': item['item_name'] or item_doc.item_name,
 				'qty': item['qty'],
@@ -187,7 +202,8 @@ class FinanceApplication(Document):
 				'amount': item['amount'],
 				'base_rate': item['base_rate'],
 				'base_amount': item['base_amount']
-			})			
+			})
+		factura.set('items', rows)
 		factura.interests = self.interests
 		factura.expiration_date = self.credit_expiration_date
 		factura.sub_total = sub_total
@@ -0,0 +1,33 @@
+// Copyright (c) 2025, Lewis Mojica and contributors
+// For license information, please see license.txt
+
+frappe.listview_settings["Finance Application"] = {
+	onload: function (listview) {
+		listview.page.add_action_item(__("Approve"), () => {
+			const names = listview.get_checked_items(true);
+			if (!names.length) {
+				frappe.msgprint(__("Select the Finance Applications to approve"));
+				return;
+			}
+
+			frappe.confirm(
+				__("Approve {0} Finance Applications? Only Pending applications are approved.", [names.length]),
+				() => {
+					frappe.call({
+						method: "financed_sales.financed_sales.bulk_approval.bulk_approve_finance_applications",
+						args: { finance_applications: names },
+						callback: (r) => {
+							if (r.message) {
+								frappe.show_alert({
+									message: __("{0} Finance Applications queued for approval", [r.message.queued]),
+									indicator: "blue",
+								});
+								listview.clear_checked_items();
+							}
+						},
+					});
+				}
+			);
+		});
+	},
+};
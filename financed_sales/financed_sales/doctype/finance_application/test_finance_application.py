@@ -49,3 +49,47 @@ class TestFinanceApplication(unittest.TestCase):
 			"Payment should be for the correct customer")
 		self.assertEqual(payment_entry.mode_of_payment, 'Cash',
 			"Payment mode should be Cash")
+
+	def test_approval_creates_documents_and_sets_status(self):
+		"""The approval job should create the invoice and plan and mark the application Completed"""
+		from financed_sales.financed_sales.create_docs_on_approval import enqueue_approval, process_approval
+
+		test_data = create_finance_application()
+		finance_app = frappe.get_doc('Finance Application', test_data['finance_application'])
+		finance_app.db_set('workflow_state', 'Approved')
+
+		enqueue_approval(finance_app)
+		self.assertEqual(frappe.db.get_value('Finance Application', finance_app.name, 'approval_status'), 'Queued')
+		# the queued job
+		process_approval(finance_app.name)
+
+		credit_invoice, payment_plan, approval_status = frappe.db.get_value(
+			'Finance Application', finance_app.name, ['credit_invoice', 'payment_plan', 'approval_status']
+		)
+		self.assertEqual(approval_status, 'Completed')
+		self.assertTrue(frappe.db.exists('Payment Plan', payment_plan))
+		self.assertEqual(
+			frappe.db.get_value('Sales Invoice', credit_invoice, 'custom_payment_plan'), payment_plan
+		)
+
+	def test_bulk_approval_approves_pending_applications(self):
+		"""Bulk approval should approve every Pending application and report progress"""
+		from financed_sales.financed_sales.bulk_approval import (
+			approve_chunk,
+			bulk_approve_finance_applications,
+			get_bulk_approval_status,
+		)
+
+		names = [create_finance_application()['finance_application'] for _i in range(2)]
+
+		response = bulk_approve_finance_applications(names)
+		# the queued chunk job
+		approve_chunk(response['batch_id'], names)
+		status = get_bulk_approval_status(response['batch_id'])
+
+		self.assertEqual(response['queued'], 2)
+		self.assertEqual(status['processed'], 2)
+		self.assertEqual(sorted(status['approved']), sorted(names))
+		for name in names:
+			self.assertEqual(frappe.db.get_value('Finance Application', name, 'workflow_state'), 'Approved')
+			self.assertTrue(frappe.db.get_value('Finance Application', name, 'payment_plan'))
@@ -1,9 +1,16 @@
 # Copyright (c) 2025, Lewis Mojica and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
+PARENT_DATE_INDEX = "parent_date_index"
+
 
 class FinancedPaymentRef(Document):
 	pass
+
+
+def on_doctype_update():
+	# Serves MAX(date) ... WHERE parent = %s without touching the table rows
+	frappe.db.add_index("Financed Payment Ref", ["parent", "date"], PARENT_DATE_INDEX)
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Lewis Mojica and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Financed Payment Request", {
+// 	refresh(frm) {
+
+// 	},
+// });
@@ -0,0 +1,26 @@
+# Copyright (c) 2026, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class FinancedPaymentRequest(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		error: DF.SmallText | None
+		idempotency_key: DF.Data
+		payment_entry: DF.Link | None
+		request_args: DF.JSON | None
+		source_doctype: DF.Link | None
+		source_name: DF.DynamicLink | None
+		status: DF.Literal["Queued", "Processing", "Completed", "Failed"]
+	# end: auto-generated types
+
+	pass
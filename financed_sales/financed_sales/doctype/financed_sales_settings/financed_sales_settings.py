@@ -1,9 +1,63 @@
 # Copyright (c) 2025, Lewis Mojica and contributors
 # For license information, please see license.txt
 
-# import frappe
+from dataclasses import asdict, dataclass
+
+import frappe
 from frappe.model.document import Document
+from frappe.utils import cint, flt
+
+SETTINGS_CACHE_KEY = "financed_sales:settings"
 
 
 class FinancedSalesSettings(Document):
-	pass
+	def on_update(self):
+		clear_settings_cache()
+
+
+@dataclass(frozen=True)
+class Settings:
+	"""Read-only snapshot of Financed Sales Settings."""
+
+	interests_account: str | None = None
+	penalty_income_account: str | None = None
+	down_payment_percent: float = 0
+	rate_period: str = "Monthly"
+	interest_rate: float = 0
+	application_fee: float = 0
+	snapshot_retention_days: int = 730
+	payoff_interest_rebate_percent: float = 0
+
+
+def get_settings() -> Settings:
+	"""Return Financed Sales Settings, read from the database at most once per cache lifetime.
+
+	The values live in Redis until the settings are saved and are memoized on
+	`frappe.local`, so each request or job builds the snapshot only once.
+	"""
+	settings = getattr(frappe.local, "financed_sales_settings", None)
+	if settings is None:
+		values = frappe.cache().get_value(SETTINGS_CACHE_KEY, generator=_load_settings)
+		settings = frappe.local.financed_sales_settings = Settings(**values)
+	return settings
+
+
+def clear_settings_cache():
+	frappe.cache().delete_value(SETTINGS_CACHE_KEY)
+	frappe.local.financed_sales_settings = None
+
+
+def _load_settings():
+	doc = frappe.get_single("Financed Sales Settings")
+	return asdict(
+		Settings(
+			interests_account=doc.interests_account,
+			penalty_income_account=doc.penalty_income_account,
+			down_payment_percent=flt(doc.down_payment_percent),
+			rate_period=doc.rate_period or "Monthly",
+			interest_rate=flt(doc.interest_rate),
+			application_fee=flt(doc.application_fee),
+			snapshot_retention_days=cint(doc.snapshot_retention_days),
+			payoff_interest_rebate_percent=flt(doc.payoff_interest_rebate_percent),
+		)
+	)
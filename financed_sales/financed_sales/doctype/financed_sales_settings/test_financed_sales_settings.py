@@ -1,9 +1,25 @@
 # Copyright (c) 2025, Lewis Mojica and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from financed_sales.financed_sales.doctype.financed_sales_settings.financed_sales_settings import get_settings
+
 
 class TestFinancedSalesSettings(FrappeTestCase):
-	pass
+	def test_get_settings_is_refreshed_on_save(self):
+		"""Saving the settings should invalidate the cached snapshot"""
+		settings = frappe.get_single("Financed Sales Settings")
+		original_fee = settings.application_fee
+
+		try:
+			self.assertEqual(get_settings().application_fee, original_fee or 0)
+
+			settings.application_fee = (original_fee or 0) + 123
+			settings.save()
+
+			self.assertEqual(get_settings().application_fee, (original_fee or 0) + 123)
+		finally:
+			settings.application_fee = original_fee
+			settings.save()
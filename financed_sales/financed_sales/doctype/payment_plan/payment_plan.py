@@ -4,13 +4,30 @@
 import frappe
 from frappe.model.document import Document
 from financed_sales.financed_sales.update_payments import auto_alloc_payments, apply_installments_state
+from financed_sales.financed_sales.page.overdue_financed_sales.overdue_financed_sales import invalidate_overdue_cache
+from financed_sales.financed_sales.doctype.customer_exposure.customer_exposure import update_customer_exposure
 from datetime import datetime, date
+import math
+
+PENALTY_GRACE_DAYS = 5
+PENALTY_PERIOD_DAYS = 30
+PENALTY_RATE = 0.05
 
 
 class PaymentPlan(Document):
 	def validate(self):
 		self.validate_credit_invoice()
 		self.validate_installments()
+		self.update_payment_totals()
+
+	def before_update_after_submit(self):
+		self.update_payment_totals()
+
+	def update_payment_totals(self):
+		"""Keep total_paid and last_payment_date in sync with the payment_refs table"""
+		self.total_paid = sum(row.amount or 0 for row in self.payment_refs)
+		payment_dates = [frappe.utils.getdate(row.date) for row in self.payment_refs if row.date]
+		self.last_payment_date = max(payment_dates) if payment_dates else None
 	
 	def validate_credit_invoice(self):
 		"""Validate that credit invoice is provided"""
@@ -23,8 +40,10 @@ class PaymentPlan(Document):
 			frappe.throw("Installments table cannot be empty. Please add at least one installment.")
 	
 	def before_submit(self):
-		state = auto_alloc_payments(self.down_payment_amount, self.installments, self.payment_refs)
-		apply_installments_state(self, state)
+		# Plans created at approval time may carry an allocation computed by the caller
+		if not self.flags.allocation_precomputed:
+			state = auto_alloc_payments(self.down_payment_amount, self.installments, self.payment_refs)
+			apply_installments_state(self, state)
 		self.update_payment_plan_state()
 	
 	def after_submit(self):
@@ -75,7 +94,7 @@ class PaymentPlan(Document):
 			frappe.log_error(f"Failed to update Payment Plan {self.name} status: {str(e)}")
 			# Don't raise exception to avoid breaking payment processing
 	
-	def calculate_overdue_penalties(self, calc_date=None):
+	def calculate_overdue_penalties(self, calc_date=None, update_db=True, commit=True):
 		"""Calculate progressive penalties for overdue installments using 30-day periods.
 		
 		Penalty structure:
@@ -90,12 +109,14 @@ class PaymentPlan(Document):
 		
 		Args:
 			calc_date: Date to calculate penalties for. Can be date object or string (YYYY-MM-DD). Defaults to today.
+			update_db: Write changed installments straight to the database and commit. When False only
+				the in-memory installments are updated, for callers that save the whole plan themselves.
+			commit: Commit the database update. Payment pipelines that must roll back as a whole
+				pass False and leave the commit to their caller.
 		
 		Returns:
 			int: Number of installments that had penalties updated.
 		"""
-		import math
-		
 		if not self.installments:
 			return 0
 		
@@ -112,21 +133,9 @@ class PaymentPlan(Document):
 				installment.due_date < calc_date and 
 				installment.pending_amount > 0):
 				
-				# Calculate days overdue
-				days_overdue = (calc_date - installment.due_date).days
-				
-				# Calculate penalty based on 30-day periods with grace period
-				if days_overdue <= 5:
-					# Grace period - no penalty
-					new_penalty = 0
-				else:
-					# Calculate 30-day periods overdue after grace period
-					days_after_grace = days_overdue - 5
-					periods_overdue = math.ceil(days_after_grace / 30.0)
-					penalty_rate = periods_overdue * 0.05  # 5% per 30-day period
-					# Calculate penalty on unpaid installment amount (excluding previous penalties)
-					unpaid_installment = installment.amount - installment.paid_amount
-					new_penalty = round(unpaid_installment * penalty_rate, 2)
+				new_penalty = get_installment_penalty(
+					installment.amount, installment.paid_amount, installment.due_date, calc_date
+				)
 				
 				# Calculate expected pending amount including penalty
 				expected_pending_amount = (installment.amount - installment.paid_amount) + new_penalty
@@ -136,16 +145,17 @@ class PaymentPlan(Document):
 					abs(installment.pending_amount - expected_pending_amount) > 0.01):
 
 					# Use direct database update for submitted documents
-					frappe.db.set_value("Payment Plan Installment", installment.name, {
-						"penalty_amount": new_penalty,
-						"pending_amount": expected_pending_amount
-					})
+					if update_db:
+						frappe.db.set_value("Payment Plan Installment", installment.name, {
+							"penalty_amount": new_penalty,
+							"pending_amount": expected_pending_amount
+						})
 					# Also update in-memory object so reload() isn't needed
 					installment.penalty_amount = new_penalty
 					installment.pending_amount = expected_pending_amount
 					updated_count += 1
 		
-		if updated_count > 0:
+		if updated_count > 0 and update_db and commit:
 			frappe.db.commit()
 		
 		return updated_count
@@ -202,3 +212,29 @@ class PaymentPlan(Document):
 		# Set flag to ignore links during cancellation
 		self.flags.ignore_links = True
 
+	def on_update_after_submit(self):
+		"""Re-score the plan when its collection fields change"""
+		if any(
+			self.has_value_changed(fieldname)
+			for fieldname in ("collector", "promise_to_pay_date", "last_contact_date")
+		):
+			invalidate_overdue_cache(self.name)
+
+	def on_cancel(self):
+		"""Drop the cancelled plan from the overdue cache and the customer's exposure"""
+		invalidate_overdue_cache(self.name)
+		update_customer_exposure(self.customer)
+
+
+def get_installment_penalty(amount, paid_amount, due_date, calc_date):
+	"""Penalty owed on an installment as of `calc_date`.
+
+	5% of the unpaid installment amount (previous penalties excluded) per 30-day
+	period overdue, after a 5 day grace period.
+	"""
+	days_overdue = (frappe.utils.getdate(calc_date) - frappe.utils.getdate(due_date)).days
+	if days_overdue <= PENALTY_GRACE_DAYS:
+		return 0
+
+	periods_overdue = math.ceil((days_overdue - PENALTY_GRACE_DAYS) / PENALTY_PERIOD_DAYS)
+	return round((amount - (paid_amount or 0)) * (periods_overdue * PENALTY_RATE), 2)
@@ -89,3 +89,48 @@ class TestPaymentPlan(FrappeTestCase):
 		finally:
 			# Restore original user
 			frappe.set_user(original_user)
+
+	def test_payment_plan_created_on_approval_has_all_rows(self):
+		"""Installments copied from the application should be persisted and submitted"""
+		from financed_sales.financed_sales.factories.payment_plan.base import create_payment_plan
+
+		result = create_payment_plan()
+		finance_application = frappe.get_doc("Finance Application", result["finance_application"])
+		payment_plan = frappe.get_doc("Payment Plan", result["payment_plan"])
+
+		self.assertEqual(payment_plan.docstatus, 1)
+		self.assertEqual(len(payment_plan.installments), len(finance_application.installments))
+		self.assertEqual(
+			[row.amount for row in payment_plan.installments],
+			[row.amount for row in finance_application.installments],
+		)
+		self.assertTrue(all(row.docstatus == 1 for row in payment_plan.installments))
+
+	def test_payment_plan_created_on_approval_allocates_overpaid_down_payment(self):
+		"""Application payments beyond the down payment should be allocated to the installments"""
+		from financed_sales.financed_sales.api import create_payment_entry_from_finance_application
+		from financed_sales.financed_sales.create_docs_on_approval import on_approval
+		from financed_sales.financed_sales.factories.finance_application import create_finance_application
+		from financed_sales.financed_sales.factories.payment_plan_factory import (
+			_get_or_create_test_mode_of_payment,
+		)
+
+		result = create_finance_application()
+		finance_application = frappe.get_doc("Finance Application", result["finance_application"])
+		first_installment = finance_application.installments[0].amount
+		create_payment_entry_from_finance_application(
+			finance_application.name,
+			finance_application.down_payment_amount + first_installment,
+			_get_or_create_test_mode_of_payment(result["company"]),
+			submit=True,
+		)
+
+		finance_application.reload()
+		finance_application.db_set("workflow_state", "Approved")
+		on_approval(finance_application)
+		payment_plan = frappe.get_doc("Payment Plan", finance_application.payment_plan)
+
+		self.assertEqual(payment_plan.docstatus, 1)
+		self.assertEqual(payment_plan.installments[0].paid_amount, first_installment)
+		self.assertEqual(payment_plan.installments[0].pending_amount, 0)
+		self.assertEqual(payment_plan.installments[1].paid_amount, 0)
@@ -1,9 +1,16 @@
 # Copyright (c) 2025, Lewis Mojica and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
+OVERDUE_INDEX = "due_date_pending_amount_parent_index"
+
 
 class PaymentPlanInstallment(Document):
 	pass
+
+
+def on_doctype_update():
+	# Serves the overdue scans: due_date < today AND pending_amount > 0, joined on parent
+	frappe.db.add_index("Payment Plan Installment", ["due_date", "pending_amount", "parent"], OVERDUE_INDEX)
@@ -0,0 +1,16 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+SNAPSHOT_DATE_INDEX = "snapshot_date_payment_plan_index"
+
+
+class PaymentPlanSnapshot(Document):
+	pass
+
+
+def on_doctype_update():
+	# Serves date range reads (month ends, trends) and the retention purge
+	frappe.db.add_index("Payment Plan Snapshot", ["snapshot_date", "payment_plan"], SNAPSHOT_DATE_INDEX)
@@ -1,5 +1,6 @@
 """Factory for creating Finance Applications."""
 import frappe
+from ..amortization import get_amortization_schedule
 from ..api import create_finance_application as api_create_finance_application
 from .quotation import create_quotation
 from .helpers import _ensure_financed_sales_settings
@@ -31,17 +32,20 @@ def create_finance_application():
     finance_application.first_installment = frappe.utils.add_days(frappe.utils.today(), 30)
 
     # Calculate and add installments
-    amount_to_finance = finance_application.total_amount_to_finance - finance_application.down_payment_amount
-    monthly_installment = amount_to_finance / finance_application.repayment_term
-
-    for i in range(finance_application.repayment_term):
-        installment_date = frappe.utils.add_months(finance_application.first_installment, i)
-        finance_application.append('installments', {
-            'doctype': 'Financed Sale Installment',
-            'installment_date': installment_date,
-            'due_date': installment_date,
-            'amount': monthly_installment
-        })
+    schedule = get_amortization_schedule(
+        finance_application.total_amount_to_finance,
+        finance_application.down_payment_amount,
+        finance_application.interest_rate,
+        finance_application.repayment_term,
+        finance_application.first_installment,
+        finance_application.rate_period,
+        finance_application.amortization_method or 'Flat',
+    )
+    finance_application.installment = schedule['installment']
+    finance_application.total_credit = schedule['total_credit']
+    finance_application.interests = schedule['interests']
+    finance_application.credit_expiration_date = schedule['credit_expiration_date']
+    finance_application.set('installments', schedule['installments'])
 
     # Submit Finance Application
     finance_application.workflow_state = 'Pending'
@@ -1,6 +1,7 @@
 """Factory for creating Payment Plans with overdue installments and penalties."""
 import frappe
 from .base import create_payment_plan
+from ...page.overdue_financed_sales.overdue_financed_sales import invalidate_overdue_cache
 
 
 def create_overdue_payment_plan():
@@ -33,6 +34,9 @@ def create_overdue_payment_plan():
             'pending_amount': installment.amount + penalty
         })
 
+    # Direct DB writes bypass the hooks that keep the overdue cache current
+    invalidate_overdue_cache(result['payment_plan'])
+
     frappe.db.commit()
 
     return result
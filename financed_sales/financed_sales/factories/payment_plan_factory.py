@@ -300,6 +300,9 @@ def create_test_payment_plan_for_payment_entry():
     # Step 10: Approve Finance Application using workflow API (creates Payment Plan + Credit Invoice automatically)
     finance_app.reload()
     apply_workflow(finance_app, 'Approve')
+    # Run the approval job queued by the workflow
+    from ..create_docs_on_approval import process_approval
+    process_approval(finance_app.name)
 
     # Get the automatically created Payment Plan and Credit Invoice
     finance_app.reload()
@@ -0,0 +1,85 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+"""Cached Mode of Payment resolution (type and default account per company)."""
+
+import frappe
+
+# Redis hash: mode of payment -> details
+MODE_OF_PAYMENT_CACHE_KEY = "financed_sales:mode_of_payment"
+ALL_MODES_FIELD = "__all__"
+
+
+def get_mode_of_payment_details(mode_of_payment):
+	"""Resolve a Mode of Payment's type and default accounts.
+
+	Returns:
+		frappe._dict: {
+			'type': Mode of Payment type (Cash, Bank, ...),
+			'accounts': {company: default_account},
+			'default_account': first configured default account (None if there is none)
+		}
+		or None if the Mode of Payment does not exist.
+	"""
+	cache = frappe.cache()
+	details = cache.hget(MODE_OF_PAYMENT_CACHE_KEY, mode_of_payment)
+	if details is None:
+		details = _load_mode_of_payment_details([mode_of_payment]).get(mode_of_payment)
+		if details is None:
+			return None
+		cache.hset(MODE_OF_PAYMENT_CACHE_KEY, mode_of_payment, details)
+	return details
+
+
+def get_mode_of_payment_account(mode_of_payment, company=None):
+	"""Default account of `mode_of_payment` for `company`, falling back to its first account."""
+	details = get_mode_of_payment_details(mode_of_payment)
+	if not details:
+		return None
+	return details.accounts.get(company) or details.default_account
+
+
+def get_all_mode_of_payment_details():
+	"""Details of every enabled Mode of Payment, keyed by name."""
+	cache = frappe.cache()
+	all_details = cache.hget(MODE_OF_PAYMENT_CACHE_KEY, ALL_MODES_FIELD)
+	if all_details is None:
+		names = frappe.get_all("Mode of Payment", filters={"enabled": 1}, pluck="name")
+		all_details = _load_mode_of_payment_details(names)
+		cache.hset(MODE_OF_PAYMENT_CACHE_KEY, ALL_MODES_FIELD, all_details)
+	return all_details
+
+
+def clear_mode_of_payment_cache(doc=None, method=None):
+	"""Drop cached Mode of Payment details. Hooked to Mode of Payment on_update/on_trash."""
+	frappe.cache().delete_key(MODE_OF_PAYMENT_CACHE_KEY)
+
+
+def boot_session(bootinfo):
+	"""Send every Mode of Payment's type and accounts to the browser once per session."""
+	bootinfo.financed_sales_modes_of_payment = get_all_mode_of_payment_details()
+
+
+def _load_mode_of_payment_details(names):
+	if not names:
+		return {}
+
+	details = {
+		mode.name: frappe._dict(type=mode.type, accounts={}, default_account=None)
+		for mode in frappe.get_all(
+			"Mode of Payment", filters={"name": ["in", names]}, fields=["name", "type"]
+		)
+	}
+	for account in frappe.get_all(
+		"Mode of Payment Account",
+		filters={"parent": ["in", list(details)], "parenttype": "Mode of Payment"},
+		fields=["parent", "company", "default_account"],
+		order_by="idx asc",
+	):
+		mode = details[account.parent]
+		if account.default_account and mode.default_account is None:
+			mode.default_account = account.default_account
+		if account.company and account.default_account:
+			mode.accounts.setdefault(account.company, account.default_account)
+
+	return details
@@ -62,6 +62,31 @@ class OverdueFinancedSales {
 			this.elements.layout
 		);
 
+		// Export menu
+		wrapper.page.add_menu_item(__("Export CSV"), function () {
+			me.export_data("CSV");
+		});
+		wrapper.page.add_menu_item(__("Export Excel"), function () {
+			me.export_data("XLSX");
+		});
+
+		frappe.realtime.on("overdue_export_ready", function (data) {
+			frappe.show_alert({
+				message: __("Overdue export is ready"),
+				indicator: "green",
+			});
+			window.open(data.file_url);
+		});
+
+		// Patch the table with per-plan deltas pushed by the server to Payment Plan readers
+		frappe.realtime.doctype_subscribe("Payment Plan");
+		frappe.realtime.on("overdue_financed_sales_delta", function (delta) {
+			if (delta.company && delta.company !== me.company) {
+				return;
+			}
+			me.apply_delta(delta);
+		});
+
 		this.company = frappe.defaults.get_user_default("company");
 
 		// bind refresh
@@ -92,6 +117,28 @@ class OverdueFinancedSales {
 		});
 	}
 
+	export_data(file_format) {
+		if (!this.company) {
+			frappe.throw(__("Please Select a Company."));
+		}
+
+		frappe.call({
+			method: "financed_sales.financed_sales.page.overdue_financed_sales.overdue_financed_sales.export_overdue_data",
+			args: {
+				company: this.company,
+				file_format: file_format,
+			},
+			callback: function (r) {
+				if (!r.exc) {
+					frappe.show_alert({
+						message: __("Export started, the file will open when it is ready"),
+						indicator: "blue",
+					});
+				}
+			},
+		});
+	}
+
 	render() {
 		let me = this;
 		
@@ -109,7 +156,7 @@ class OverdueFinancedSales {
 	render_overdue_table() {
 		let me = this;
 		
-		let table_html = '<div class="overdue-summary"><h4>Overdue Financed Sales (' + me.data.length + ' records)</h4></div>';
+		let table_html = '<div class="overdue-summary"><h4></h4></div>';
 		table_html += '<table class="table table-bordered overdue-table">';
 		table_html += '<thead><tr>';
 		table_html += '<th>Customer</th>';
@@ -119,16 +166,64 @@ class OverdueFinancedSales {
 		table_html += '</tr></thead><tbody>';
 
 		me.data.forEach(function(row) {
-			let days_class = row.days_overdue > 30 ? "text-danger" : "text-warning";
-			table_html += '<tr>';
-			table_html += '<td><strong>' + row.customer + '</strong></td>';
-			table_html += '<td><a href="/app/payment-plan/' + row.payment_plan + '" target="_blank">' + row.payment_plan + '</a></td>';
-			table_html += '<td>$' + row.overdue_amount.toFixed(2) + '</td>';
-			table_html += '<td class="' + days_class + '"><strong>' + row.days_overdue + ' days</strong></td>';
-			table_html += '</tr>';
+			table_html += me.get_row_html(row);
 		});
 
 		table_html += '</tbody></table>';
 		me.elements.content_wrapper.html(table_html);
+		me.update_summary();
+	}
+
+	get_row_html(row) {
+		let days_class = row.days_overdue > 30 ? "text-danger" : "text-warning";
+		let row_html = '<tr data-payment-plan="' + row.payment_plan + '">';
+		row_html += '<td><strong>' + row.customer + '</strong></td>';
+		row_html += '<td><a href="/app/payment-plan/' + row.payment_plan + '" target="_blank">' + row.payment_plan + '</a></td>';
+		row_html += '<td>$' + row.overdue_amount.toFixed(2) + '</td>';
+		row_html += '<td class="' + days_class + '"><strong>' + row.days_overdue + ' days</strong></td>';
+		row_html += '</tr>';
+		return row_html;
+	}
+
+	update_summary() {
+		this.elements.content_wrapper
+			.find(".overdue-summary h4")
+			.text("Overdue Financed Sales (" + this.data.length + " records)");
+	}
+
+	apply_delta(delta) {
+		let me = this;
+		if (!me.data) {
+			return;
+		}
+
+		let index = me.data.findIndex((row) => row.payment_plan === delta.payment_plan);
+		if (index !== -1) {
+			me.data.splice(index, 1);
+		}
+		if (delta.row) {
+			// Keep the most overdue first ordering
+			let position = me.data.findIndex((row) => row.days_overdue < delta.row.days_overdue);
+			position = position === -1 ? me.data.length : position;
+			me.data.splice(position, 0, delta.row);
+		}
+
+		if (!me.data.length || !me.elements.content_wrapper.find(".overdue-table").length) {
+			me.render();
+			return;
+		}
+
+		let tbody = me.elements.content_wrapper.find(".overdue-table tbody");
+		tbody.find('tr[data-payment-plan="' + delta.payment_plan + '"]').remove();
+		if (delta.row) {
+			let new_row = $(me.get_row_html(delta.row));
+			let next_row = me.data[me.data.indexOf(delta.row) + 1];
+			if (next_row) {
+				new_row.insertBefore(tbody.find('tr[data-payment-plan="' + next_row.payment_plan + '"]'));
+			} else {
+				new_row.appendTo(tbody);
+			}
+		}
+		me.update_summary();
 	}
 };
\ No newline at end of file
@@ -1,59 +1,337 @@
 # Copyright (c) 2024, Lewis Mojica and Contributors
 # License: GNU General Public License v3. See license.txt
 
+import csv
+from functools import partial
+
 import frappe
 from frappe import _
+from frappe.realtime import get_doctype_room
+from frappe.utils import date_diff, today
+
+from financed_sales.financed_sales.utils import get_cached_hash
+
+# Redis hash per company: payment plan name -> overdue row (None marks a stale row)
+OVERDUE_CACHE_KEY = "financed_sales:overdue_data"
+# Redis hash: company -> date the company's overdue cache was built for
+OVERDUE_CACHE_INDEX_KEY = "financed_sales:overdue_data_index"
+AS_OF_FIELD = "__as_of__"
+
+EXPORT_FORMATS = ("CSV", "XLSX")
+EXPORT_COLUMNS = ("Customer", "Payment Plan", "Overdue Amount", "Days Overdue")
 
 
 @frappe.whitelist()
-def get_overdue_data(company):
-	"""Get overdue payment plan data for the specified company."""
+def get_overdue_data(company, refresh=False):
+	"""Get overdue payment plan data for the specified company.
+
+	Rows are served from a per-company cache that is rebuilt once per day (or when
+	`refresh` is set) and patched plan by plan through `invalidate_overdue_cache`.
+	"""
 	if not company:
 		frappe.throw(_("Please select a company"))
 
-	# Get Payment Plan installments that are overdue
-	from frappe.utils import today, date_diff
+	rows = None if frappe.utils.cint(refresh) else get_cached_overdue_rows(company)
+	if rows is None:
+		rows = build_overdue_cache(company)
+
+	current_date = today()
+	result = []
+	for row in rows.values():
+		result.append(
+			{
+				"payment_plan": row["payment_plan"],
+				"customer": row["customer"],
+				"overdue_amount": row["overdue_amount"],
+				"days_overdue": date_diff(current_date, row["oldest_due_date"]),
+			}
+		)
+
+	# Sort by days overdue (most overdue first)
+	result.sort(key=lambda x: x["days_overdue"], reverse=True)
+
+	return result
+
+
+def query_overdue_rows(payment_plans=None, company=None):
+	"""Aggregate overdue installments per Payment Plan in a single query.
+
+	Args:
+		payment_plans (list, optional): Restrict the query to these Payment Plans.
+		company (str, optional): Restrict the query to plans invoiced by this company.
+
+	Returns:
+		dict: Payment Plan name -> {payment_plan, customer, company, overdue_amount, oldest_due_date}
+	"""
+	if payment_plans is not None and not payment_plans:
+		return {}
+
+	query, values = _get_overdue_query(payment_plans, company)
+	overdue_plans = frappe.db.sql(query, values, as_dict=True)
+
+	return {row["payment_plan"]: row for row in overdue_plans}
 
-	overdue_installments = frappe.db.sql("""
-		SELECT ppi.parent, ppi.due_date, ppi.pending_amount
+
+def _get_overdue_query(payment_plans=None, company=None):
+	conditions = ""
+	values = {"today": today()}
+	if payment_plans:
+		conditions += "AND ppi.parent IN %(payment_plans)s"
+		values["payment_plans"] = tuple(payment_plans)
+	if company:
+		conditions += " AND si.company = %(company)s"
+		values["company"] = company
+
+	query = f"""
+		SELECT
+			ppi.parent AS payment_plan,
+			pp.customer AS customer,
+			si.company AS company,
+			SUM(ppi.pending_amount) AS overdue_amount,
+			MIN(ppi.due_date) AS oldest_due_date
 		FROM `tabPayment Plan Installment` ppi
 		INNER JOIN `tabPayment Plan` pp ON pp.name = ppi.parent
-		WHERE ppi.due_date < %s
+		LEFT JOIN `tabSales Invoice` si ON si.name = pp.credit_invoice
+		WHERE ppi.due_date < %(today)s
 		AND ppi.pending_amount > 0
 		AND pp.docstatus = 1
-	""", (today(),), as_dict=True)
-
-	# Group by Payment Plan and calculate overdue amounts
-	overdue_plans = {}
-	for installment in overdue_installments:
-		plan_name = installment["parent"]
-		if plan_name not in overdue_plans:
-			overdue_plans[plan_name] = {
-				"payment_plan": plan_name,
-				"overdue_amount": 0,
-				"oldest_due_date": installment["due_date"]
-			}
-		
-		overdue_plans[plan_name]["overdue_amount"] += installment["pending_amount"]
-		
-		# Track oldest due date for days calculation
-		if installment["due_date"] < overdue_plans[plan_name]["oldest_due_date"]:
-			overdue_plans[plan_name]["oldest_due_date"] = installment["due_date"]
-
-	# Get customer info and calculate days overdue
-	result = []
-	for plan_data in overdue_plans.values():
-		payment_plan = frappe.get_doc("Payment Plan", plan_data["payment_plan"])
+		{conditions}
+		GROUP BY ppi.parent, pp.customer, si.company
+	"""
 
-		plan_data["customer"] = payment_plan.customer
-		plan_data["days_overdue"] = date_diff(today(), plan_data["oldest_due_date"])
+	return query, values
 
-		# Remove oldest_due_date from result
-		del plan_data["oldest_due_date"]
 
-		result.append(plan_data)
+def get_cached_overdue_rows(company):
+	"""Return the cached overdue rows for `company`, or None if there is no current cache.
+
+	Rows evicted by `invalidate_overdue_cache` are reloaded with one query restricted
+	to those Payment Plans.
+	"""
+	cache = frappe.cache()
+	cache_key = _get_cache_key(company)
+	cached = get_cached_hash(cache_key)
+	if not cached or cached.pop(AS_OF_FIELD, None) != today():
+		return None
+
+	stale_plans = [plan for plan, row in cached.items() if row is None]
+	if stale_plans:
+		fresh_rows = query_overdue_rows(stale_plans, company)
+		for plan in stale_plans:
+			if plan in fresh_rows:
+				cached[plan] = fresh_rows[plan]
+				cache.hset(cache_key, plan, fresh_rows[plan])
+			else:
+				del cached[plan]
+				cache.hdel(cache_key, plan)
+
+	return cached
+
+
+def build_overdue_cache(company):
+	"""Reload every overdue row from the database and cache it for `company`."""
+	cache = frappe.cache()
+	cache_key = _get_cache_key(company)
+	rows = query_overdue_rows(company=company)
+
+	cache.delete_key(cache_key)
+	for plan, row in rows.items():
+		cache.hset(cache_key, plan, row)
+	cache.hset(cache_key, AS_OF_FIELD, today())
+	cache.hset(OVERDUE_CACHE_INDEX_KEY, company, today())
+
+	return rows
+
+
+def invalidate_overdue_cache(payment_plan=None):
+	"""Evict cached overdue rows once the current transaction commits.
+
+	Evicting earlier would let a concurrent read cache the rows the transaction is
+	about to change; a rolled back transaction evicts nothing.
+
+	Args:
+		payment_plan (str, optional): Only evict this Payment Plan's row. The row is
+			reloaded (and the plan re-scored in the collections worklist) on the next
+			read, and open overdue pages receive a delta for it. When omitted the
+			whole cache is dropped.
+	"""
+	frappe.db.after_commit.add(partial(_evict_overdue_cache, payment_plan))
+
+
+def _evict_overdue_cache(payment_plan=None):
+	cache = frappe.cache()
+	cached_companies = get_cached_hash(OVERDUE_CACHE_INDEX_KEY)
+
+	if not payment_plan:
+		for company in cached_companies:
+			cache.delete_key(_get_cache_key(company))
+		cache.delete_key(OVERDUE_CACHE_INDEX_KEY)
+		return
+
+	# Read the plan's current and cached rows before its cached row is marked stale
+	current_row = query_overdue_rows([payment_plan]).get(payment_plan)
+	previous_row = None
+	was_listed = None
+	for company, as_of in cached_companies.items():
+		if as_of != today():
+			continue
+		cache_key = _get_cache_key(company)
+		cached_row = cache.hget(cache_key, payment_plan)
+		if cached_row:
+			previous_row, was_listed = cached_row, True
+		elif current_row and current_row["company"] == company and not cache.hexists(cache_key, payment_plan):
+			# the plan's company cache is current and does not list it
+			was_listed = False
+		cache.hset(cache_key, payment_plan, None)
+
+	publish_overdue_delta(payment_plan, current_row, previous_row, was_listed)
+
+	from financed_sales.financed_sales.collections_worklist import mark_worklist_dirty
+
+	mark_worklist_dirty(payment_plan)
+
+
+def publish_overdue_delta(payment_plan, current_row, previous_row=None, was_listed=None):
+	"""Send open overdue pages the change for a single Payment Plan.
+
+	Called after the change is committed. The delta goes to users subscribed to
+	Payment Plan (the socket server checks their read permission).
+	Its `change` is one of `paid_off`, `removed` (not overdue, previous state
+	unknown), `newly_overdue`, `amount_reduced` or `updated`; `row` is None when
+	the plan is not overdue, so pages always drop it.
+
+	Args:
+		current_row: The plan's overdue row now, None if it is not overdue.
+		previous_row: The plan's cached row before the change, if it was cached.
+		was_listed: Whether the plan was in the overdue list; None when unknown.
+	"""
+	if not current_row:
+		change = "paid_off" if previous_row else "removed"
+	elif previous_row:
+		change = "amount_reduced" if current_row["overdue_amount"] < previous_row["overdue_amount"] else "updated"
+	elif was_listed is False:
+		change = "newly_overdue"
+	else:
+		change = "updated"
+
+	row = None
+	if current_row:
+		row = {
+			"payment_plan": payment_plan,
+			"customer": current_row["customer"],
+			"overdue_amount": current_row["overdue_amount"],
+			"days_overdue": date_diff(today(), current_row["oldest_due_date"]),
+		}
+
+	frappe.publish_realtime(
+		"overdue_financed_sales_delta",
+		{
+			"payment_plan": payment_plan,
+			"company": current_row["company"] if current_row else None,
+			"change": change,
+			"row": row,
+		},
+		room=get_doctype_room("Payment Plan"),
+	)
+
+
+@frappe.whitelist()
+def export_overdue_data(company, file_format="CSV"):
+	"""Enqueue a CSV/XLSX export of the overdue portfolio.
+
+	The file is written by a background job and attached as a private File. The
+	requesting user is notified through the `overdue_export_ready` realtime event.
+
+	Returns:
+		str: Background job ID.
+	"""
+	if not company:
+		frappe.throw(_("Please select a company"))
+	if file_format not in EXPORT_FORMATS:
+		frappe.throw(_("Unsupported export format: {0}").format(file_format))
+
+	job = frappe.enqueue(
+		"financed_sales.financed_sales.page.overdue_financed_sales.overdue_financed_sales.build_overdue_export",
+		queue="long",
+		company=company,
+		file_format=file_format,
+		user=frappe.session.user,
+	)
+	return job.id if job else None
+
+
+def build_overdue_export(company, file_format="CSV", user=None):
+	"""Write the overdue portfolio to a private File without holding it in memory.
+
+	Rows are streamed from the database through an unbuffered (server-side)
+	cursor and written to disk one by one, so memory use does not grow with the
+	size of the portfolio.
+
+	Returns:
+		str: URL of the created File.
+	"""
+	extension = file_format.lower()
+	file_name = f"overdue-financed-sales-{frappe.scrub(company)}-{today()}-{frappe.generate_hash(length=6)}.{extension}"
+	file_path = frappe.get_site_path("private", "files", file_name)
+
+	if file_format == "XLSX":
+		_write_overdue_xlsx(file_path, company)
+	else:
+		_write_overdue_csv(file_path, company)
+
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": f"/private/files/{file_name}",
+			"is_private": 1,
+		}
+	).insert(ignore_permissions=True)
+
+	if user:
+		frappe.publish_realtime(
+			"overdue_export_ready",
+			{"company": company, "file_url": file_doc.file_url},
+			user=user,
+			after_commit=True,
+		)
+
+	return file_doc.file_url
+
+
+def iter_overdue_export_rows(company=None):
+	"""Yield export rows straight from a server-side cursor."""
+	current_date = today()
+	query, values = _get_overdue_query(company=company)
+	with frappe.db.unbuffered_cursor():
+		for row in frappe.db.sql(query, values, as_dict=True, as_iterator=True):
+			yield (
+				row["customer"],
+				row["payment_plan"],
+				row["overdue_amount"],
+				date_diff(current_date, row["oldest_due_date"]),
+			)
+
+
+def _write_overdue_csv(file_path, company=None):
+	with open(file_path, "w", newline="", encoding="utf-8") as f:
+		writer = csv.writer(f)
+		writer.writerow(EXPORT_COLUMNS)
+		for row in iter_overdue_export_rows(company):
+			writer.writerow(row)
+
+
+def _write_overdue_xlsx(file_path, company=None):
+	from openpyxl import Workbook
+
+	# write-only workbooks flush rows to disk instead of keeping cells in memory
+	workbook = Workbook(write_only=True)
+	sheet = workbook.create_sheet("Overdue Financed Sales")
+	sheet.append(EXPORT_COLUMNS)
+	for row in iter_overdue_export_rows(company):
+		sheet.append(row)
+	workbook.save(file_path)
 
-	# Sort by days overdue (most overdue first)
-	result.sort(key=lambda x: x["days_overdue"], reverse=True)
 
-	return result
\ No newline at end of file
+def _get_cache_key(company):
+	return f"{OVERDUE_CACHE_KEY}:{company}"
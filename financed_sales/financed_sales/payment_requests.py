@@ -0,0 +1,168 @@
+# Copyright (c) 2026, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+"""Idempotent and queued execution of the payment APIs.
+
+Each call carrying an idempotency key is recorded as a Financed Payment Request
+(key -> status and resulting Payment Entry). A retried call with the same key
+returns the stored result instead of running the payment pipeline again.
+
+The key row is committed before the pipeline runs. A failed payment is rolled
+back as a whole and its Failed status is then written and committed in a fresh
+transaction.
+"""
+
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import cint
+
+REQUEST_DOCTYPE = "Financed Payment Request"
+
+
+def run_payment_request(source_doctype, source_name, kwargs, idempotency_key=None, queue=False):
+	"""
+	Run (or enqueue) a payment API call once per idempotency key.
+	`source_doctype`: "Payment Plan" or "Finance Application"
+	`kwargs`: arguments for the payment API, without idempotency/queue options
+	Returns: <Payment Entry name> when the payment completed, otherwise
+	{ status, idempotency_key } for queued or in-flight requests.
+	"""
+	idempotency_key = idempotency_key or frappe.generate_hash(length=20)
+
+	existing = _get_request(idempotency_key)
+	if existing and existing.status != "Failed":
+		return _get_request_result(existing)
+
+	request_args = json.dumps(kwargs, default=str)
+	status = "Queued" if cint(queue) else "Processing"
+	if existing:
+		# A failed attempt left nothing behind, so the payment can be retried
+		frappe.db.set_value(
+			REQUEST_DOCTYPE, idempotency_key, {"status": status, "error": None, "request_args": request_args}
+		)
+	else:
+		try:
+			frappe.get_doc(
+				{
+					"doctype": REQUEST_DOCTYPE,
+					"idempotency_key": idempotency_key,
+					"status": status,
+					"source_doctype": source_doctype,
+					"source_name": source_name,
+					"request_args": request_args,
+				}
+			).insert(ignore_permissions=True)
+		except frappe.DuplicateEntryError:
+			# A concurrent retry got there first; a locking read sees its committed row
+			return _get_request_result(_get_request(idempotency_key, for_update=True), idempotency_key)
+
+	# Commit the key row before any payment work so retries always find it
+	frappe.db.commit()
+
+	if cint(queue):
+		frappe.enqueue(
+			"financed_sales.financed_sales.payment_requests.process_payment_request",
+			queue="long",
+			enqueue_after_commit=True,
+			idempotency_key=idempotency_key,
+		)
+		return {"status": "Queued", "idempotency_key": idempotency_key}
+
+	return process_payment_request(idempotency_key, raise_exception=True)
+
+
+def process_payment_request(idempotency_key, raise_exception=False):
+	"""
+	Execute a recorded payment request and store its result.
+	Used directly for synchronous calls and as the background job for queued ones.
+	Returns: <Payment Entry name> or None if the payment failed.
+	"""
+	from financed_sales.financed_sales.api import (
+		create_payment_entry_from_finance_application,
+		create_payment_entry_from_payment_plan,
+	)
+
+	request = frappe.get_doc(REQUEST_DOCTYPE, idempotency_key)
+	if request.status == "Completed":
+		return request.payment_entry
+
+	kwargs = json.loads(request.request_args or "{}")
+	if request.status != "Processing":
+		request.db_set("status", "Processing")
+		frappe.db.commit()
+
+	try:
+		if request.source_doctype == "Payment Plan":
+			payment_entry = create_payment_entry_from_payment_plan(**kwargs)
+		else:
+			payment_entry = create_payment_entry_from_finance_application(**kwargs)
+	except Exception as e:
+		# Roll back to the committed key row; payment hooks may commit, which would release a savepoint
+		frappe.db.rollback()
+		frappe.db.set_value(REQUEST_DOCTYPE, idempotency_key, {"status": "Failed", "error": str(e)})
+		frappe.db.commit()
+		_notify(request, "Failed", error=str(e))
+		if raise_exception:
+			raise
+		frappe.log_error(f"Queued payment {idempotency_key} failed: {e!s}")
+		return None
+
+	frappe.db.set_value(
+		REQUEST_DOCTYPE,
+		idempotency_key,
+		{"status": "Completed", "payment_entry": payment_entry, "error": None},
+	)
+	_notify(request, "Completed", payment_entry=payment_entry)
+	return payment_entry
+
+
+@frappe.whitelist()
+def get_payment_request_status(idempotency_key):
+	"""Returns: { status, idempotency_key, payment_entry, error } or None for unknown keys."""
+	request = _get_request(idempotency_key)
+	if not request:
+		return None
+	if request.owner != frappe.session.user and not frappe.has_permission(REQUEST_DOCTYPE, "read"):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	return {
+		"status": request.status,
+		"idempotency_key": idempotency_key,
+		"payment_entry": request.payment_entry,
+		"error": request.error,
+	}
+
+
+def _get_request(idempotency_key, for_update=False):
+	return frappe.db.get_value(
+		REQUEST_DOCTYPE,
+		idempotency_key,
+		["name", "status", "payment_entry", "error", "owner"],
+		as_dict=True,
+		for_update=for_update,
+	)
+
+
+def _get_request_result(request, idempotency_key=None):
+	if not request:
+		# The concurrent request's row is gone again (its transaction did not commit)
+		frappe.throw(_("Payment request {0} could not be recorded, please retry").format(idempotency_key))
+	if request.status == "Completed":
+		return request.payment_entry
+	return {"status": request.status, "idempotency_key": request.name}
+
+
+def _notify(request, status, payment_entry=None, error=None):
+	frappe.publish_realtime(
+		"financed_payment_request",
+		{
+			"idempotency_key": request.name,
+			"status": status,
+			"payment_entry": payment_entry,
+			"error": error,
+		},
+		user=request.owner,
+		after_commit=True,
+	)
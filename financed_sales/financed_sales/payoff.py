@@ -0,0 +1,142 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+"""Early payoff quotes.
+
+The settlement amount to close a Payment Plan on a given date is its unpaid
+down payment and installment amounts, plus the penalties owed as of that date,
+minus a rebate on the interest of installments not yet due. The rebate is the
+share of that unearned interest set in Financed Sales Settings; each
+installment's interest is taken in proportion to the Finance Application's
+interests over its total credit.
+
+Quotes read the pending installment columns of the quoted plans in one query
+instead of loading the Payment Plan documents.
+"""
+
+from decimal import Decimal
+
+import frappe
+from frappe import _
+from frappe.utils import getdate, today
+
+from financed_sales.financed_sales.amortization import _round_cents, from_cents, to_cents
+from financed_sales.financed_sales.doctype.financed_sales_settings.financed_sales_settings import get_settings
+from financed_sales.financed_sales.doctype.payment_plan.payment_plan import get_installment_penalty
+from financed_sales.financed_sales.portfolio_snapshot import OPEN_STATUSES
+
+
+@frappe.whitelist()
+def get_payoff_quote(payment_plan, as_of_date=None):
+	"""Quote the amount that settles a Payment Plan on `as_of_date` (default today).
+
+	Returns:
+		dict: payment_plan, customer, as_of_date, outstanding_amount (unpaid down
+			payment and installments, financed interest included), penalties,
+			unearned_interest, interest_rebate and settlement_amount.
+	"""
+	frappe.has_permission("Payment Plan", "read", payment_plan, throw=True)
+	quotes = get_payoff_quotes(as_of_date, payment_plan=payment_plan)
+	if not quotes:
+		frappe.throw(_("Payment Plan {0} is not submitted").format(payment_plan))
+	return quotes[0]
+
+
+@frappe.whitelist()
+def get_customer_payoff_quotes(customer, as_of_date=None):
+	"""Quote every open Payment Plan of a customer in one call.
+
+	Returns:
+		dict: customer, as_of_date, quotes (one per plan, as in `get_payoff_quote`)
+			and settlement_amount for all of them.
+	"""
+	frappe.has_permission("Payment Plan", "read", throw=True)
+	quotes = get_payoff_quotes(as_of_date, customer=customer)
+	return {
+		"customer": customer,
+		"as_of_date": str(getdate(as_of_date or today())),
+		"quotes": quotes,
+		"settlement_amount": from_cents(sum(to_cents(quote["settlement_amount"]) for quote in quotes)),
+	}
+
+
+def get_payoff_quotes(as_of_date=None, payment_plan=None, customer=None):
+	"""Payoff quotes for one submitted Payment Plan or for a customer's open plans."""
+	as_of_date = getdate(as_of_date or today())
+	rebate_rate = Decimal(str(get_settings().payoff_interest_rebate_percent)) / 100
+
+	if payment_plan:
+		conditions = "pp.name = %(payment_plan)s"
+	else:
+		conditions = "pp.customer = %(customer)s AND pp.status IN %(statuses)s"
+
+	rows = frappe.db.sql(
+		f"""
+		SELECT
+			pp.name AS payment_plan,
+			pp.customer,
+			IFNULL(pp.pending_down_payment_amount, 0) AS pending_down_payment,
+			IFNULL(fa.interests, 0) AS interests,
+			IFNULL(fa.total_credit, 0) AS total_credit,
+			ppi.due_date,
+			ppi.amount,
+			ppi.paid_amount
+		FROM `tabPayment Plan` pp
+		LEFT JOIN `tabFinance Application` fa ON fa.name = pp.finance_application
+		LEFT JOIN `tabPayment Plan Installment` ppi
+			ON ppi.parent = pp.name
+			AND ppi.parenttype = 'Payment Plan'
+			AND ppi.pending_amount > 0
+		WHERE pp.docstatus = 1
+		AND {conditions}
+		ORDER BY pp.name, ppi.idx
+		""",
+		{"payment_plan": payment_plan, "customer": customer, "statuses": OPEN_STATUSES},
+		as_dict=True,
+	)
+
+	totals = {}
+	for row in rows:
+		plan = totals.get(row.payment_plan)
+		if not plan:
+			plan = totals[row.payment_plan] = {
+				"customer": row.customer,
+				"outstanding": to_cents(row.pending_down_payment),
+				"penalties": 0,
+				"unearned_interest": Decimal(0),
+			}
+		if row.due_date is None:
+			continue
+
+		amount = to_cents(row.amount)
+		paid = to_cents(row.paid_amount)
+		unpaid = max(amount - paid, 0)
+		plan["outstanding"] += unpaid
+
+		due_date = getdate(row.due_date)
+		if due_date < as_of_date:
+			paid_principal = min(row.paid_amount or 0, row.amount)
+			penalty = to_cents(get_installment_penalty(row.amount, paid_principal, due_date, as_of_date))
+			# payments beyond the installment amount went to its penalty
+			plan["penalties"] += max(penalty - max(paid - amount, 0), 0)
+		elif due_date > as_of_date and row.total_credit:
+			interest_share = Decimal(str(row.interests)) / Decimal(str(row.total_credit))
+			plan["unearned_interest"] += unpaid * interest_share
+
+	quotes = []
+	for name, plan in totals.items():
+		unearned_interest = _round_cents(plan["unearned_interest"])
+		rebate = _round_cents(plan["unearned_interest"] * rebate_rate)
+		quotes.append(
+			{
+				"payment_plan": name,
+				"customer": plan["customer"],
+				"as_of_date": str(as_of_date),
+				"outstanding_amount": from_cents(plan["outstanding"]),
+				"penalties": from_cents(plan["penalties"]),
+				"unearned_interest": from_cents(unearned_interest),
+				"interest_rebate": from_cents(rebate),
+				"settlement_amount": from_cents(plan["outstanding"] + plan["penalties"] - rebate),
+			}
+		)
+	return quotes
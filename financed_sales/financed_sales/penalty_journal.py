@@ -4,6 +4,8 @@
 import frappe
 from erpnext.accounts.party import get_party_account
 
+from financed_sales.financed_sales.doctype.financed_sales_settings.financed_sales_settings import get_settings
+
 
 def create_penalty_journal_entry(penalty_amount, customer, payment_plan_name, posting_date=None):
 	"""
@@ -28,7 +30,7 @@ def create_penalty_journal_entry(penalty_amount, customer, payment_plan_name, po
 	"""
 
 	# Validate penalty account configuration
-	settings = frappe.get_single("Financed Sales Settings")
+	settings = get_settings()
 	if not settings.penalty_income_account:
 		frappe.throw(
 			"Penalty Income Account is not configured in Financed Sales Settings. Please configure it before processing penalty payments."
@@ -0,0 +1,143 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+"""Daily portfolio snapshots.
+
+A nightly job appends one Payment Plan Snapshot row per open plan with its
+outstanding amount and penalty, overdue amount and bucket, and status as of
+that day. Questions about past portfolio state (what was overdue at a month
+end, how the overdue balance trended) read these rows instead of replaying
+payments against the penalty logic.
+
+Rows are aggregated in one query and written with one bulk INSERT. Snapshots
+older than the retention configured in Financed Sales Settings are purged by
+the same job.
+"""
+
+import frappe
+from frappe.utils import add_days, date_diff, getdate, now, today
+
+from financed_sales.financed_sales.doctype.financed_sales_settings.financed_sales_settings import get_settings
+
+OPEN_STATUSES = ("Active", "Overdue")
+# Overdue buckets as (last day overdue, bucket), the last bucket catching everything older
+OVERDUE_BUCKETS = ((0, "Current"), (30, "1-30"), (60, "31-60"), (90, "61-90"))
+OLDEST_BUCKET = "90+"
+SNAPSHOT_FIELDS = (
+	"snapshot_date",
+	"payment_plan",
+	"customer",
+	"company",
+	"status",
+	"outstanding_amount",
+	"outstanding_penalty",
+	"overdue_amount",
+	"days_overdue",
+	"overdue_bucket",
+)
+
+
+def take_portfolio_snapshot(snapshot_date=None):
+	"""Scheduled job: snapshot every open Payment Plan and purge expired snapshots.
+
+	Taking the snapshot of a date again replaces that date's rows.
+
+	Returns:
+		int: Number of snapshot rows written.
+	"""
+	snapshot_date = getdate(snapshot_date or today())
+	rows = get_snapshot_rows(snapshot_date)
+
+	frappe.db.delete("Payment Plan Snapshot", {"snapshot_date": snapshot_date})
+	timestamp = now()
+	frappe.db.bulk_insert(
+		"Payment Plan Snapshot",
+		(*SNAPSHOT_FIELDS, "creation", "modified", "owner", "modified_by"),
+		[
+			(
+				*(row[field] for field in SNAPSHOT_FIELDS),
+				timestamp,
+				timestamp,
+				"Administrator",
+				"Administrator",
+			)
+			for row in rows
+		],
+	)
+
+	purge_expired_snapshots(snapshot_date)
+	return len(rows)
+
+
+def get_snapshot_rows(snapshot_date, customer=None):
+	"""Aggregate the open Payment Plans' installments as of `snapshot_date` in one query.
+
+	Args:
+		customer (str, optional): Only aggregate this customer's plans.
+	"""
+	conditions = "AND pp.customer = %(customer)s" if customer else ""
+	plans = frappe.db.sql(
+		f"""
+		SELECT
+			pp.name AS payment_plan,
+			pp.customer,
+			pp.status,
+			si.company,
+			IFNULL(pp.pending_down_payment_amount, 0) AS pending_down_payment,
+			IFNULL(SUM(ppi.pending_amount), 0) AS pending_amount,
+			IFNULL(SUM(LEAST(IFNULL(ppi.penalty_amount, 0), ppi.pending_amount)), 0) AS outstanding_penalty,
+			IFNULL(SUM(CASE WHEN ppi.due_date < %(snapshot_date)s THEN ppi.pending_amount ELSE 0 END), 0)
+				AS overdue_amount,
+			MIN(CASE WHEN ppi.due_date < %(snapshot_date)s THEN ppi.due_date END) AS oldest_due_date
+		FROM `tabPayment Plan` pp
+		LEFT JOIN `tabPayment Plan Installment` ppi
+			ON ppi.parent = pp.name
+			AND ppi.parenttype = 'Payment Plan'
+			AND ppi.pending_amount > 0
+		LEFT JOIN `tabSales Invoice` si ON si.name = pp.credit_invoice
+		WHERE pp.docstatus = 1
+		AND pp.status IN %(statuses)s
+		{conditions}
+		GROUP BY pp.name, pp.customer, pp.status, si.company, pp.pending_down_payment_amount
+		""",
+		{"snapshot_date": snapshot_date, "statuses": OPEN_STATUSES, "customer": customer},
+		as_dict=True,
+	)
+
+	rows = []
+	for plan in plans:
+		days_overdue = date_diff(snapshot_date, plan.oldest_due_date) if plan.oldest_due_date else 0
+		rows.append(
+			{
+				"snapshot_date": snapshot_date,
+				"payment_plan": plan.payment_plan,
+				"customer": plan.customer,
+				"company": plan.company,
+				"status": plan.status,
+				"outstanding_amount": plan.pending_down_payment
+				+ plan.pending_amount
+				- plan.outstanding_penalty,
+				"outstanding_penalty": plan.outstanding_penalty,
+				"overdue_amount": plan.overdue_amount,
+				"days_overdue": days_overdue,
+				"overdue_bucket": get_overdue_bucket(days_overdue),
+			}
+		)
+	return rows
+
+
+def get_overdue_bucket(days_overdue):
+	for last_day, bucket in OVERDUE_BUCKETS:
+		if days_overdue <= last_day:
+			return bucket
+	return OLDEST_BUCKET
+
+
+def purge_expired_snapshots(as_of=None):
+	"""Delete snapshots older than the configured retention. A retention of 0 keeps them all."""
+	retention_days = get_settings().snapshot_retention_days
+	if retention_days <= 0:
+		return
+
+	cutoff = add_days(as_of or today(), -retention_days)
+	frappe.db.delete("Payment Plan Snapshot", {"snapshot_date": ["<", cutoff]})
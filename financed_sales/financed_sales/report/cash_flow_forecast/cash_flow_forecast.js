@@ -0,0 +1,27 @@
+// Copyright (c) 2025, Lewis Mojica and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["Cash Flow Forecast"] = {
+	filters: [
+		{
+			fieldname: "company",
+			label: __("Company"),
+			fieldtype: "Link",
+			options: "Company",
+			default: frappe.defaults.get_user_default("Company"),
+		},
+		{
+			fieldname: "periodicity",
+			label: __("Periodicity"),
+			fieldtype: "Select",
+			options: ["Weekly", "Monthly"],
+			default: "Monthly",
+			reqd: 1,
+		},
+		{
+			fieldname: "refresh",
+			label: __("Recompute"),
+			fieldtype: "Check",
+		},
+	],
+};
@@ -0,0 +1,71 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import cint
+
+from financed_sales.financed_sales.collections_forecast import LATENESS_BUCKETS, get_forecast
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	forecast = get_forecast(refresh=cint(filters.refresh))
+	data = [
+		row
+		for row in forecast[filters.periodicity or "Monthly"]
+		if not filters.company or row["company"] == filters.company
+	]
+
+	return get_columns(), data, None, get_chart(data), get_summary(forecast)
+
+
+def get_columns():
+	return [
+		{
+			"fieldname": "company",
+			"label": _("Company"),
+			"fieldtype": "Link",
+			"options": "Company",
+			"width": 180,
+		},
+		{"fieldname": "period_start", "label": _("From"), "fieldtype": "Date", "width": 110},
+		{"fieldname": "period_end", "label": _("To"), "fieldtype": "Date", "width": 110},
+		{"fieldname": "scheduled_amount", "label": _("Scheduled"), "fieldtype": "Currency", "width": 140},
+		{"fieldname": "expected_amount", "label": _("Expected"), "fieldtype": "Currency", "width": 140},
+		{
+			"fieldname": "expected_penalties",
+			"label": _("Expected Penalties"),
+			"fieldtype": "Currency",
+			"width": 140,
+		},
+		{"fieldname": "installments", "label": _("Installments"), "fieldtype": "Int", "width": 110},
+	]
+
+
+def get_chart(data):
+	return {
+		"data": {
+			"labels": [row["period_start"] for row in data],
+			"datasets": [
+				{"name": _("Scheduled"), "values": [row["scheduled_amount"] for row in data]},
+				{"name": _("Expected"), "values": [row["expected_amount"] for row in data]},
+			],
+		},
+		"type": "bar",
+		"fieldtype": "Currency",
+	}
+
+
+def get_summary(forecast):
+	"""The lateness curve the forecast was built with."""
+	curve = forecast["curve"]
+	labels = [
+		_("On Time") if not first_day else _("{0}-{1} Days Late").format(first_day, last_day)
+		for first_day, last_day, _assumed in LATENESS_BUCKETS
+	]
+	labels.append(_("Uncollected"))
+	return [
+		{"label": label, "value": round(share * 100, 1), "datatype": "Percent"}
+		for label, share in zip(labels, curve, strict=True)
+	]
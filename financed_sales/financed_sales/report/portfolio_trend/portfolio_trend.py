@@ -0,0 +1,95 @@
+# Copyright (c) 2025, Lewis Mojica and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import cint
+
+from financed_sales.financed_sales.portfolio_snapshot import OLDEST_BUCKET, OVERDUE_BUCKETS
+
+BUCKETS = [bucket for _last_day, bucket in OVERDUE_BUCKETS[1:]] + [OLDEST_BUCKET]
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	data = get_data(filters)
+	return get_columns(), data, None, get_chart(data)
+
+
+def get_data(filters):
+	"""Portfolio totals per snapshot date, read straight from Payment Plan Snapshot."""
+	conditions = ["snapshot_date BETWEEN %(from_date)s AND %(to_date)s"]
+	if filters.company:
+		conditions.append("company = %(company)s")
+	if cint(filters.month_end_only):
+		conditions.append("snapshot_date = LAST_DAY(snapshot_date)")
+
+	bucket_columns = ",\n".join(
+		f"SUM(CASE WHEN overdue_bucket = '{bucket}' THEN overdue_amount ELSE 0 END) AS {_get_bucket_field(bucket)}"
+		for bucket in BUCKETS
+	)
+	return frappe.db.sql(
+		f"""
+		SELECT
+			snapshot_date,
+			COUNT(*) AS open_plans,
+			SUM(outstanding_amount) AS outstanding_amount,
+			SUM(outstanding_penalty) AS outstanding_penalty,
+			SUM(overdue_amount) AS overdue_amount,
+			{bucket_columns}
+		FROM `tabPayment Plan Snapshot`
+		WHERE {" AND ".join(conditions)}
+		GROUP BY snapshot_date
+		ORDER BY snapshot_date
+		""",
+		filters,
+		as_dict=True,
+	)
+
+
+def get_columns():
+	columns = [
+		{"fieldname": "snapshot_date", "label": _("Date"), "fieldtype": "Date", "width": 110},
+		{"fieldname": "open_plans", "label": _("Open Plans"), "fieldtype": "Int", "width": 100},
+		{
+			"fieldname": "outstanding_amount",
+			"label": _("Outstanding Amount"),
+			"fieldtype": "Currency",
+			"width": 160,
+		},
+		{
+			"fieldname": "outstanding_penalty",
+			"label": _("Outstanding Penalty"),
+			"fieldtype": "Currency",
+			"width": 150,
+		},
+		{"fieldname": "overdue_amount", "label": _("Overdue"), "fieldtype": "Currency", "width": 140},
+	]
+	columns += [
+		{
+			"fieldname": _get_bucket_field(bucket),
+			"label": _("Overdue {0} Days").format(bucket),
+			"fieldtype": "Currency",
+			"width": 140,
+		}
+		for bucket in BUCKETS
+	]
+	return columns
+
+
+def get_chart(data):
+	return {
+		"data": {
+			"labels": [str(row.snapshot_date) for row in data],
+			"datasets": [
+				{"name": _("Outstanding Amount"), "values": [row.outstanding_amount for row in data]},
+				{"name": _("Overdue"), "values": [row.overdue_amount for row in data]},
+			],
+		},
+		"type": "line",
+		"fieldtype": "Currency",
+	}
+
+
+def _get_bucket_field(bucket):
+	return "overdue_" + bucket.replace("-", "_").replace("+", "_plus")
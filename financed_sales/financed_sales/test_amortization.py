@@ -0,0 +1,95 @@
+import unittest
+
+import frappe
+
+from .amortization import (
+	DEFAULT_COMPARISON_TERMS,
+	compare_financing_options,
+	get_amortization_schedule,
+	get_flat_amounts,
+	get_french_amounts,
+	get_monthly_rate,
+)
+
+
+class TestAmortization(unittest.TestCase):
+	def test_flat_schedule_matches_form_formula(self):
+		"""Flat installments should equal owed / term + owed * monthly rate"""
+		schedule = get_amortization_schedule(1200, 200, 3, 12, "2026-01-15")
+
+		self.assertEqual(schedule["installment"], round(1000 / 12 + 1000 * 0.03, 2))
+		self.assertEqual(schedule["total_credit"], 1360)
+		self.assertEqual(schedule["interests"], 360)
+		self.assertEqual(schedule["credit_expiration_date"], "2026-12-15")
+		self.assertEqual(len(schedule["installments"]), 12)
+		self.assertEqual(schedule["installments"][1]["due_date"], "2026-02-15")
+
+	def test_installments_add_up_to_total_credit(self):
+		"""Rounding leftovers should be spread so rows add up to the total exactly"""
+		for amounts in (
+			get_flat_amounts(100001, get_monthly_rate(2.5), 7),
+			get_french_amounts(10000000, get_monthly_rate(18, "Annual"), 360),
+		):
+			self.assertLessEqual(max(amounts) - min(amounts), 1)
+
+		schedule = get_amortization_schedule(100000, 0, 18, 360, "2026-01-01", "Annual", "French")
+		total = sum(round(row["amount"] * 100) for row in schedule["installments"])
+		self.assertEqual(total, round(schedule["total_credit"] * 100))
+
+	def test_french_schedule_charges_less_interest_than_flat(self):
+		"""French amortization charges interest on the outstanding balance only"""
+		flat = get_amortization_schedule(10000, 0, 2, 24, "2026-01-01", "Monthly", "Flat")
+		french = get_amortization_schedule(10000, 0, 2, 24, "2026-01-01", "Monthly", "French")
+
+		self.assertLess(french["interests"], flat["interests"])
+		# 10,000 at 2% monthly over 24 months: annuity of 528.71
+		self.assertAlmostEqual(french["installment"], 528.71, places=2)
+
+	def test_user_installment_is_used_for_every_row(self):
+		schedule = get_amortization_schedule(1200, 200, 3, 12, "2026-01-15", installment=120)
+
+		self.assertTrue(all(row["amount"] == 120 for row in schedule["installments"]))
+		self.assertEqual(schedule["total_credit"], 1440)
+
+	def test_invalid_term_is_rejected(self):
+		with self.assertRaises(frappe.ValidationError):
+			get_amortization_schedule(1200, 200, 3, 361, "2026-01-15")
+
+	def test_compare_financing_options_returns_full_grid(self):
+		"""Every term x rate x down payment combination should be returned"""
+		from .factories.quotation import create_quotation
+
+		quotation = create_quotation()["quotation"]
+		grand_total = frappe.db.get_value("Quotation", quotation, "grand_total")
+
+		options = compare_financing_options(
+			quotation,
+			terms=[6, 12, 18, 24],
+			interest_rates=[2, 3],
+			down_payment_percents=[10, 20, 30],
+			rate_period="Monthly",
+		)
+
+		self.assertEqual(len(options), 4 * 2 * 3)
+		option = next(
+			o
+			for o in options
+			if o["term"] == 12 and o["interest_rate"] == 3 and o["down_payment_percent"] == 20
+		)
+		schedule = get_amortization_schedule(
+			grand_total, option["down_payment_amount"], 3, 12, "2026-01-01", "Monthly", "Flat"
+		)
+		self.assertEqual(option["installment"], schedule["installment"])
+		self.assertEqual(option["total_credit"], schedule["total_credit"])
+
+	def test_compare_financing_options_defaults_empty_lists(self):
+		"""Empty lists should fall back to the default terms and the settings rate and down payment"""
+		from .factories.quotation import create_quotation
+
+		quotation = create_quotation()["quotation"]
+
+		options = compare_financing_options(
+			quotation, terms="[]", interest_rates=[], down_payment_percents=None
+		)
+
+		self.assertEqual([option["term"] for option in options], list(DEFAULT_COMPARISON_TERMS))
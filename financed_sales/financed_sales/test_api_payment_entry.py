@@ -1,8 +1,15 @@
 import unittest
 
 import frappe
-
-from .api import create_payment_entry_from_payment_plan
+from frappe.utils import add_days, today
+
+from .api import (
+	create_payment_entry_from_payment_plan,
+	get_bulk_payment_results,
+	post_bulk_payments,
+	validate_bulk_payments,
+)
+from .factories.payment_plan.overdue import create_overdue_payment_plan
 from .factories.payment_plan_factory import create_test_payment_plan_for_payment_entry
 
 
@@ -231,3 +238,125 @@ class TestAPIPaymentEntry(unittest.TestCase):
 		self.assertIsNotNone(payment_entry.paid_to)
 		self.assertEqual(payment_entry.party_type, "Customer")
 		self.assertEqual(payment_entry.party, test_data["customer"])
+
+	def test_bulk_payments_post_valid_rows_and_report_invalid_ones(self):
+		"""Bulk posting should post valid rows and return per-row errors for invalid ones"""
+		test_data = create_test_payment_plan_for_payment_entry()
+		payment_plan = frappe.get_doc("Payment Plan", test_data["payment_plan"])
+
+		results, groups = validate_bulk_payments(
+			[
+				{
+					"payment_plan": test_data["payment_plan"],
+					"paid_amount": payment_plan.installments[0].amount,
+					"mode_of_payment": test_data["mode_of_payment"],
+				},
+				{
+					"payment_plan": "NON-EXISTENT-PLAN",
+					"paid_amount": 100,
+					"mode_of_payment": test_data["mode_of_payment"],
+				},
+			]
+		)
+
+		self.assertEqual(results[1]["status"], "Invalid")
+
+		# the background job posting the valid rows
+		batch_id = frappe.generate_hash(length=12)
+		post_bulk_payments(batch_id, groups, results, submit=False)
+
+		results = get_bulk_payment_results(batch_id)
+		self.assertEqual(results[0]["status"], "Posted")
+		self.assertTrue(frappe.db.exists("Payment Entry", results[0]["payment_entry"]))
+
+	def test_retried_payment_with_same_idempotency_key_posts_once(self):
+		"""A retried call with the same idempotency key should return the first Payment Entry"""
+		test_data = create_test_payment_plan_for_payment_entry()
+		payment_plan = frappe.get_doc("Payment Plan", test_data["payment_plan"])
+		idempotency_key = frappe.generate_hash(length=20)
+
+		kwargs = {
+			"payment_plan_name": test_data["payment_plan"],
+			"paid_amount": payment_plan.installments[0].amount,
+			"mode_of_payment": test_data["mode_of_payment"],
+			"submit": False,
+			"idempotency_key": idempotency_key,
+		}
+		first_payment_entry = create_payment_entry_from_payment_plan(**kwargs)
+		retried_payment_entry = create_payment_entry_from_payment_plan(**kwargs)
+
+		self.assertEqual(first_payment_entry, retried_payment_entry)
+		self.assertEqual(
+			frappe.db.get_value("Financed Payment Request", idempotency_key, "status"), "Completed"
+		)
+
+	def test_failed_payment_request_keeps_failed_status(self):
+		"""A keyed payment that fails should be stored as Failed with nothing posted"""
+		test_data = create_test_payment_plan_for_payment_entry()
+		idempotency_key = frappe.generate_hash(length=20)
+		payment_entries = frappe.db.count("Payment Entry")
+
+		with self.assertRaises(Exception):
+			create_payment_entry_from_payment_plan(
+				payment_plan_name=test_data["payment_plan"],
+				paid_amount=100,
+				mode_of_payment="Nonexistent Mode of Payment",
+				idempotency_key=idempotency_key,
+			)
+
+		self.assertEqual(
+			frappe.db.get_value("Financed Payment Request", idempotency_key, "status"), "Failed"
+		)
+		self.assertEqual(frappe.db.count("Payment Entry"), payment_entries)
+
+	def test_failed_backdated_payment_request_keeps_penalties(self):
+		"""A backdated keyed payment failing at Payment Entry creation should roll back its penalty rewrite"""
+		result = create_overdue_payment_plan()
+		frappe.db.set_value("Payment Plan", result["payment_plan"], "last_payment_date", None)
+		idempotency_key = frappe.generate_hash(length=20)
+
+		def get_penalties():
+			return frappe.get_all(
+				"Payment Plan Installment",
+				filters={"parent": result["payment_plan"]},
+				fields=["penalty_amount", "pending_amount"],
+				order_by="idx",
+			)
+
+		penalties = get_penalties()
+
+		with self.assertRaises(Exception):
+			create_payment_entry_from_payment_plan(
+				payment_plan_name=result["payment_plan"],
+				paid_amount=100,
+				mode_of_payment="Nonexistent Mode of Payment",
+				posting_date=add_days(today(), -20),
+				idempotency_key=idempotency_key,
+			)
+
+		self.assertEqual(
+			frappe.db.get_value("Financed Payment Request", idempotency_key, "status"), "Failed"
+		)
+		self.assertEqual(get_penalties(), penalties)
+
+	def test_cancelled_payment_is_removed_from_payment_plan(self):
+		"""Cancelling a finance Payment Entry should de-allocate it from the Payment Plan"""
+		test_data = create_test_payment_plan_for_payment_entry()
+		payment_plan = frappe.get_doc("Payment Plan", test_data["payment_plan"])
+		initial_refs = len(payment_plan.payment_refs)
+		initial_paid = [row.paid_amount for row in payment_plan.installments]
+		installment_amount = payment_plan.installments[0].amount
+
+		payment_entry_name = create_payment_entry_from_payment_plan(
+			payment_plan_name=test_data["payment_plan"],
+			paid_amount=installment_amount,
+			mode_of_payment=test_data["mode_of_payment"],
+			submit=True,
+		)
+		frappe.get_doc("Payment Entry", payment_entry_name).cancel()
+
+		payment_plan.reload()
+		self.assertEqual(len(payment_plan.payment_refs), initial_refs)
+		self.assertNotIn(payment_entry_name, [row.payment_entry for row in payment_plan.payment_refs])
+		self.assertNotIn(payment_entry_name, [row.payment_ref for row in payment_plan.installments])
+		self.assertEqual([row.paid_amount for row in payment_plan.installments], initial_paid)
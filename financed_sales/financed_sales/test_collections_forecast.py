@@ -0,0 +1,85 @@
+import unittest
+
+import frappe
+from frappe.utils import getdate
+
+from .collections_forecast import (
+	build_forecast,
+	forecast_inflows,
+	get_lateness_bucket,
+	get_settlement_dates,
+)
+from .factories.payment_plan.overdue import create_overdue_payment_plan
+
+
+def _installment(due_date, amount, pending_amount=None, penalty_amount=0, company="Test Company"):
+	return frappe._dict(
+		due_date=getdate(due_date),
+		amount=amount,
+		penalty_amount=penalty_amount,
+		pending_amount=amount if pending_amount is None else pending_amount,
+		company=company,
+	)
+
+
+class TestCollectionsForecast(unittest.TestCase):
+	def test_settlement_dates_follow_payment_order(self):
+		"""Payments settle the down payment first, then installments in order"""
+		installments = [_installment("2025-02-01", 100), _installment("2025-03-01", 100)]
+		payments = [
+			frappe._dict(date=getdate("2025-01-01"), amount=50),
+			frappe._dict(date=getdate("2025-02-10"), amount=120),
+		]
+
+		settled_on = get_settlement_dates(50, installments, payments)
+
+		self.assertEqual(settled_on, [getdate("2025-02-10"), None])
+
+	def test_lateness_buckets(self):
+		self.assertEqual(get_lateness_bucket(-5), 0)
+		self.assertEqual(get_lateness_bucket(0), 0)
+		self.assertEqual(get_lateness_bucket(20), 1)
+		self.assertEqual(get_lateness_bucket(75), 3)
+
+	def test_inflows_follow_the_lateness_curve(self):
+		"""Half paid on time, half 1-30 days late: a June 1st installment splits between June and July"""
+		curve = (0.5, 0.5, 0, 0, 0, 0)
+		installments = [_installment("2025-06-20", 1000)]
+
+		rows = forecast_inflows(installments, curve, "Monthly", getdate("2025-06-01"))
+
+		self.assertEqual([row["period_start"] for row in rows], ["2025-06-01", "2025-07-01"])
+		self.assertEqual(rows[0]["scheduled_amount"], 1000)
+		self.assertEqual(rows[0]["expected_amount"], 500)
+		self.assertEqual(rows[1]["expected_amount"], 500)
+		self.assertEqual(sum(row["expected_amount"] for row in rows), 1000)
+
+	def test_overdue_installment_renormalizes_curve(self):
+		"""An installment 40 days late can no longer be paid on time or within 30 days"""
+		curve = (0.4, 0.2, 0.2, 0, 0, 0.2)
+		installments = [_installment("2025-05-01", 1000, pending_amount=1100, penalty_amount=100)]
+
+		rows = forecast_inflows(installments, curve, "Weekly", getdate("2025-06-10"))
+
+		self.assertEqual(sum(row["expected_amount"] for row in rows), 550)
+		self.assertEqual(sum(row["expected_penalties"] for row in rows), 50)
+		# overdue amounts are scheduled for the current week
+		self.assertEqual(rows[0]["period_start"], "2025-06-09")
+		self.assertEqual(rows[0]["scheduled_amount"], 1100)
+
+	def test_forecast_includes_open_installments(self):
+		"""Every open installment of a submitted plan is scheduled in the forecast"""
+		result = create_overdue_payment_plan()
+		pending = frappe.get_all(
+			"Payment Plan Installment",
+			filters={"parent": result["payment_plan"], "pending_amount": [">", 0]},
+			pluck="pending_amount",
+		)
+
+		forecast = build_forecast()
+
+		self.assertTrue(pending)
+		for periodicity in ("Weekly", "Monthly"):
+			scheduled = sum(row["scheduled_amount"] for row in forecast[periodicity])
+			self.assertGreaterEqual(scheduled, sum(pending))
+		self.assertAlmostEqual(sum(forecast["curve"]), 1)
@@ -0,0 +1,36 @@
+import unittest
+
+import frappe
+
+from .collections_worklist import get_worklist, score_plan
+from .factories.payment_plan.overdue import create_overdue_payment_plan
+
+
+class TestCollectionsWorklist(unittest.TestCase):
+	def test_larger_and_older_debts_score_higher(self):
+		"""Amount at risk and days overdue should both raise the score"""
+		as_of = "2025-06-30"
+		base = score_plan(1000, 30, as_of=as_of)
+
+		self.assertGreater(score_plan(10000, 30, as_of=as_of), base)
+		self.assertGreater(score_plan(1000, 90, as_of=as_of), base)
+
+	def test_promise_to_pay_and_recent_contact_lower_the_score(self):
+		"""A pending promise or a recent contact should push the account down the list"""
+		as_of = "2025-06-30"
+		base = score_plan(1000, 30, as_of=as_of)
+
+		self.assertLess(score_plan(1000, 30, promise_to_pay_date="2025-07-05", as_of=as_of), base)
+		self.assertGreater(score_plan(1000, 30, promise_to_pay_date="2025-06-20", as_of=as_of), base)
+		self.assertLess(score_plan(1000, 30, last_contact_date="2025-06-29", as_of=as_of), base)
+
+	def test_assigned_overdue_plan_in_collector_worklist(self):
+		"""An overdue plan assigned to a collector should appear in that collector's worklist"""
+		result = create_overdue_payment_plan()
+		payment_plan = frappe.get_doc("Payment Plan", result["payment_plan"])
+		payment_plan.collector = "Administrator"
+		payment_plan.save()
+
+		worklist = get_worklist("Administrator", limit=1000)
+
+		self.assertIn(result["payment_plan"], [row["payment_plan"] for row in worklist])
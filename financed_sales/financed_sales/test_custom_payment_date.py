@@ -61,6 +61,26 @@ class TestCustomPaymentDate(unittest.TestCase):
 
 		self.assertIn("Payment date cannot be before", str(context.exception))
 
+	def test_payment_updates_payment_plan_totals(self):
+		"""Test that Payment Plan total_paid and last_payment_date follow submitted payments"""
+		test_data = create_test_payment_plan_for_payment_entry()
+		payment_plan = frappe.get_doc("Payment Plan", test_data["payment_plan"])
+		initial_total = payment_plan.total_paid or 0
+
+		create_payment_entry_from_payment_plan(
+			payment_plan_name=test_data["payment_plan"],
+			paid_amount=1000,
+			mode_of_payment=test_data["mode_of_payment"],
+			submit=True,
+			posting_date="2026-03-20",
+		)
+
+		total_paid, last_payment_date = frappe.db.get_value(
+			"Payment Plan", test_data["payment_plan"], ["total_paid", "last_payment_date"]
+		)
+		self.assertEqual(total_paid, initial_total + 1000)
+		self.assertEqual(str(last_payment_date), "2026-03-20")
+
 	def test_payment_with_custom_date_creates_je_with_correct_date(self):
 		"""Test that Journal Entry is created with custom posting date when penalty exists"""
 		test_data = create_test_payment_plan_for_payment_entry()
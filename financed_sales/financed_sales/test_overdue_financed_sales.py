@@ -2,7 +2,11 @@ import unittest
 
 import frappe
 
-from financed_sales.financed_sales.page.overdue_financed_sales.overdue_financed_sales import get_overdue_data
+from financed_sales.financed_sales.page.overdue_financed_sales.overdue_financed_sales import (
+	get_cached_overdue_rows,
+	get_overdue_data,
+	invalidate_overdue_cache,
+)
 from financed_sales.financed_sales.factories.payment_plan.base import create_payment_plan
 from financed_sales.financed_sales.factories.payment_plan.overdue import create_overdue_payment_plan
 from financed_sales.financed_sales.factories.payment_plan.cancelled import create_cancelled_overdue_payment_plan
@@ -44,3 +48,60 @@ class TestOverdueFinancedSales(unittest.TestCase):
 		# Cancelled plan should NOT appear in results
 		payment_plan_names = [item['payment_plan'] for item in overdue_data]
 		self.assertNotIn(result['payment_plan'], payment_plan_names)
+
+	def test_invalidated_payment_plan_row_is_reloaded(self):
+		"""Invalidating a plan should refresh only that plan's cached row"""
+		result = create_overdue_payment_plan()
+
+		# Build the cache
+		overdue_data = get_overdue_data(result['company'])
+		self.assertIn(result['payment_plan'], [item['payment_plan'] for item in overdue_data])
+
+		# Pay off every installment behind the cache's back
+		frappe.db.sql(
+			"UPDATE `tabPayment Plan Installment` SET pending_amount = 0 WHERE parent = %s",
+			result['payment_plan'],
+		)
+
+		# Stale row is still served until the plan is invalidated
+		overdue_data = get_overdue_data(result['company'])
+		self.assertIn(result['payment_plan'], [item['payment_plan'] for item in overdue_data])
+
+		invalidate_overdue_cache(result['payment_plan'])
+
+		# The row is only evicted once the change is committed
+		overdue_data = get_overdue_data(result['company'])
+		self.assertIn(result['payment_plan'], [item['payment_plan'] for item in overdue_data])
+
+		frappe.db.commit()
+		overdue_data = get_overdue_data(result['company'])
+		self.assertNotIn(result['payment_plan'], [item['payment_plan'] for item in overdue_data])
+
+	def test_cache_is_served_for_its_company_only(self):
+		"""After a build the cache should be read back, holding only that company's plans"""
+		result = create_overdue_payment_plan()
+		get_overdue_data(result['company'], refresh=True)
+
+		cached = get_cached_overdue_rows(result['company'])
+
+		self.assertIsNotNone(cached)
+		self.assertIn(result['payment_plan'], cached)
+		self.assertEqual({row['company'] for row in cached.values()}, {result['company']})
+
+	def test_rolled_back_invalidation_keeps_cached_row(self):
+		"""A rolled back transaction should not evict the plan's cached row"""
+		result = create_overdue_payment_plan()
+		get_overdue_data(result['company'], refresh=True)
+		frappe.db.sql(
+			"UPDATE `tabPayment Plan Installment` SET pending_amount = 0 WHERE parent = %s",
+			result['payment_plan'],
+		)
+		frappe.db.commit()
+
+		invalidate_overdue_cache(result['payment_plan'])
+		frappe.db.rollback()
+		frappe.db.commit()
+
+		# Not evicted: the stale row is still served
+		cached = get_cached_overdue_rows(result['company'])
+		self.assertIn(result['payment_plan'], cached)
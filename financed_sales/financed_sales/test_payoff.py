@@ -0,0 +1,71 @@
+import unittest
+
+import frappe
+from frappe.utils import today
+
+from .doctype.payment_plan.payment_plan import get_installment_penalty
+from .factories.payment_plan.overdue import create_overdue_payment_plan
+from .payoff import get_customer_payoff_quotes, get_payoff_quote
+
+
+class TestPayoff(unittest.TestCase):
+	def test_installment_penalty_periods(self):
+		"""5% of the unpaid amount per started 30-day period after a 5 day grace period"""
+		self.assertEqual(get_installment_penalty(1000, 0, "2025-01-01", "2025-01-06"), 0)
+		self.assertEqual(get_installment_penalty(1000, 0, "2025-01-01", "2025-01-07"), 50)
+		self.assertEqual(get_installment_penalty(1000, 400, "2025-01-01", "2025-02-05"), 30)
+		self.assertEqual(get_installment_penalty(1000, 0, "2025-01-01", "2025-02-06"), 100)
+
+	def test_quote_adds_penalties_as_of_date(self):
+		"""The settlement is the unpaid amounts plus the penalties owed on the quote date"""
+		result = create_overdue_payment_plan()
+		payment_plan = frappe.get_doc("Payment Plan", result["payment_plan"])
+
+		quote = get_payoff_quote(payment_plan.name)
+
+		pending = [row for row in payment_plan.installments if row.pending_amount > 0]
+		expected_outstanding = (payment_plan.pending_down_payment_amount or 0) + sum(
+			row.amount - row.paid_amount for row in pending
+		)
+		expected_penalties = sum(
+			get_installment_penalty(row.amount, row.paid_amount, row.due_date, today())
+			for row in pending
+			if str(row.due_date) < today()
+		)
+		self.assertAlmostEqual(quote["outstanding_amount"], expected_outstanding, places=2)
+		self.assertAlmostEqual(quote["penalties"], expected_penalties, places=2)
+		self.assertAlmostEqual(
+			quote["settlement_amount"],
+			quote["outstanding_amount"] + quote["penalties"] - quote["interest_rebate"],
+			places=2,
+		)
+
+	def test_rebate_follows_settings(self):
+		"""A 100% rebate waives all the interest of installments not yet due"""
+		result = create_overdue_payment_plan()
+		settings = frappe.get_single("Financed Sales Settings")
+		original_rebate = settings.payoff_interest_rebate_percent
+		try:
+			settings.payoff_interest_rebate_percent = 100
+			settings.save()
+			quote = get_payoff_quote(result["payment_plan"])
+		finally:
+			settings.payoff_interest_rebate_percent = original_rebate
+			settings.save()
+
+		self.assertGreater(quote["unearned_interest"], 0)
+		self.assertEqual(quote["interest_rebate"], quote["unearned_interest"])
+
+	def test_customer_batch_includes_open_plans(self):
+		"""The batch quote covers the customer's open plans and sums their settlements"""
+		result = create_overdue_payment_plan()
+		customer = frappe.db.get_value("Payment Plan", result["payment_plan"], "customer")
+
+		quotes = get_customer_payoff_quotes(customer)
+
+		self.assertIn(result["payment_plan"], [quote["payment_plan"] for quote in quotes["quotes"]])
+		self.assertAlmostEqual(
+			quotes["settlement_amount"],
+			sum(quote["settlement_amount"] for quote in quotes["quotes"]),
+			places=2,
+		)
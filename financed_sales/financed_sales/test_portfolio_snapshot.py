@@ -0,0 +1,52 @@
+import unittest
+
+import frappe
+from frappe.utils import add_days, today
+
+from .factories.payment_plan.overdue import create_overdue_payment_plan
+from .portfolio_snapshot import get_overdue_bucket, purge_expired_snapshots, take_portfolio_snapshot
+
+
+class TestPortfolioSnapshot(unittest.TestCase):
+	def test_overdue_buckets(self):
+		self.assertEqual(get_overdue_bucket(0), "Current")
+		self.assertEqual(get_overdue_bucket(30), "1-30")
+		self.assertEqual(get_overdue_bucket(61), "61-90")
+		self.assertEqual(get_overdue_bucket(200), "90+")
+
+	def test_snapshot_records_overdue_plan(self):
+		"""An overdue plan gets one row with its overdue amount, bucket and penalties"""
+		result = create_overdue_payment_plan()
+
+		take_portfolio_snapshot()
+		# taking the same day's snapshot again replaces its rows
+		take_portfolio_snapshot()
+
+		rows = frappe.get_all(
+			"Payment Plan Snapshot",
+			filters={"payment_plan": result["payment_plan"], "snapshot_date": today()},
+			fields=["overdue_amount", "overdue_bucket", "days_overdue", "outstanding_penalty"],
+		)
+		self.assertEqual(len(rows), 1)
+		self.assertGreater(rows[0].overdue_amount, 0)
+		self.assertEqual(rows[0].days_overdue, 60)
+		self.assertEqual(rows[0].overdue_bucket, "31-60")
+		self.assertGreater(rows[0].outstanding_penalty, 0)
+
+	def test_expired_snapshots_are_purged(self):
+		"""Snapshots older than the retention are deleted"""
+		create_overdue_payment_plan()
+		old_date = add_days(today(), -10)
+		take_portfolio_snapshot(old_date)
+
+		settings = frappe.get_single("Financed Sales Settings")
+		original_retention = settings.snapshot_retention_days
+		try:
+			settings.snapshot_retention_days = 5
+			settings.save()
+			purge_expired_snapshots()
+		finally:
+			settings.snapshot_retention_days = original_retention
+			settings.save()
+
+		self.assertFalse(frappe.db.exists("Payment Plan Snapshot", {"snapshot_date": old_date}))
@@ -0,0 +1,51 @@
+import unittest
+
+import frappe
+
+from .utils import distribute_interest_to_items, to_cents
+
+
+def make_item(item_code, qty, rate):
+	return frappe._dict(
+		item_code=item_code,
+		item_name=item_code,
+		qty=qty,
+		rate=rate,
+		amount=round(qty * rate, 2),
+		uom="Nos",
+		conversion_factor=1,
+	)
+
+
+class TestDistributeInterestToItems(unittest.TestCase):
+	def test_interest_is_distributed_exactly(self):
+		"""Distributed interest should add up to the total interest to the cent"""
+		items = [make_item(f"ITEM-{i}", qty=(i % 7) + 1, rate=10 + i * 1.37) for i in range(500)]
+
+		financed_items = distribute_interest_to_items(items, 12345.67)
+
+		distributed = sum(to_cents(row["amount"]) for row in financed_items) - sum(
+			to_cents(item.amount) for item in items
+		)
+		self.assertEqual(distributed, 1234567)
+
+	def test_financed_rate_multiplies_back_to_amount(self):
+		"""Every line's rate times qty should equal its financed amount"""
+		items = [make_item("A", 3, 10), make_item("B", 1, 5), make_item("C", 12, 2.5)]
+
+		financed_items = distribute_interest_to_items(items, 10)
+
+		for row in financed_items:
+			self.assertAlmostEqual(round(row["rate"], 2) * row["qty"], row["amount"], places=9)
+		self.assertEqual(sum(to_cents(row["amount"]) for row in financed_items), 6500 + 1000)
+
+	def test_rounding_is_not_pushed_to_the_last_line(self):
+		"""Equal lines should receive shares at most one cent apart"""
+		items = [make_item(f"ITEM-{i}", 1, 100) for i in range(3)]
+
+		shares = [to_cents(row["amount"]) - 10000 for row in distribute_interest_to_items(items, 1)]
+		self.assertEqual(sum(shares), 100)
+		self.assertLessEqual(max(shares) - min(shares), 1)
+
+	def test_no_interest_returns_empty_list(self):
+		self.assertEqual(distribute_interest_to_items([make_item("A", 1, 10)], 0), [])
@@ -2,6 +2,11 @@ from copy import deepcopy
 
 import frappe
 
+from financed_sales.financed_sales.doctype.customer_exposure.customer_exposure import update_customer_exposure
+from financed_sales.financed_sales.page.overdue_financed_sales.overdue_financed_sales import (
+	invalidate_overdue_cache,
+)
+
 
 def main(pe, method):
 	if not pe.custom_is_finance_payment:
@@ -21,15 +26,7 @@ def main(pe, method):
 	if pe.unallocated_amount != 0.00:
 		frappe.throw(f"Unallocated amount must be 0.00 and is {pe.unallocated_amount}")
 
-	# Get primary reference for Finance Application lookup (Sales Order or Sales Invoice)
-	# Sales Order is used for Pending state (down payments)
-	# Sales Invoice is used for Approved state (installment payments)
-	primary_ref = None
-	for ref in pe.references:
-		if ref.reference_doctype in ["Sales Invoice", "Sales Order"]:
-			primary_ref = ref
-			break
-
+	primary_ref = get_primary_reference(pe)
 	if not primary_ref:
 		frappe.throw("Sales Order or Sales Invoice reference is required for Finance Application lookup")
 
@@ -48,6 +45,48 @@ def main(pe, method):
 	if (fa.workflow_state, primary_ref.reference_doctype) not in valid_state_and_ref_combinations:
 		frappe.throw(f"Wrong ref doctype for {fa.workflow_state} Finance Application")
 	update_payments(fa, pe, save=True)
+	if fa.payment_plan:
+		invalidate_overdue_cache(fa.payment_plan)
+		update_customer_exposure(fa.customer)
+
+
+def on_cancel(pe, method):
+	"""Remove a cancelled finance Payment Entry from its Payment Plan (or Finance Application)."""
+	if not pe.custom_is_finance_payment:
+		return
+
+	primary_ref = get_primary_reference(pe)
+	if not primary_ref:
+		return
+
+	fa_name = frappe.get_value(
+		primary_ref.reference_doctype, primary_ref.reference_name, "custom_finance_application"
+	)
+	if not fa_name:
+		return
+
+	fa = frappe.get_doc("Finance Application", fa_name)
+	if any(payment.payment_entry == pe.name for payment in fa.payment_refs):
+		remove_payment(fa, pe.name)
+
+	if fa.payment_plan:
+		payment_plan = frappe.get_doc("Payment Plan", fa.payment_plan)
+		if payment_plan.docstatus == 1:
+			remove_payment(payment_plan, pe.name)
+			invalidate_overdue_cache(payment_plan.name)
+			update_customer_exposure(payment_plan.customer)
+
+
+def get_primary_reference(pe):
+	"""Return the Payment Entry reference used for the Finance Application lookup.
+
+	Sales Order is used for Pending state (down payments), Sales Invoice for
+	Approved state (installment payments).
+	"""
+	for ref in pe.references:
+		if ref.reference_doctype in ["Sales Invoice", "Sales Order"]:
+			return ref
+	return None
 
 
 def update_payments(fa, pe, save=False):
@@ -66,19 +105,7 @@ def update_payments(fa, pe, save=False):
 			"date": pe.posting_date,
 		},
 	)
-	# update down payment fields
-	paid_down_payment = 0
-	for payment in doc.payment_refs:
-		paid_down_payment += payment.amount
-
-	doc.paid_down_payment_amount = (
-		paid_down_payment if paid_down_payment < doc.down_payment_amount else doc.down_payment_amount
-	)
-	doc.pending_down_payment_amount = max(0, doc.down_payment_amount - paid_down_payment)
-	if doc.down_payment_amount and doc.pending_down_payment_amount:
-		doc.paid_down_payment_percent = 100 * paid_down_payment / doc.down_payment_amount
-	else:
-		doc.paid_down_payment_percent = 100
+	update_down_payment_totals(doc)
 
 	# update installments payments
 	if doc.doctype == "Payment Plan":
@@ -94,6 +121,7 @@ def update_payments(fa, pe, save=False):
 		print(
 			f" ~~~~~~ init new inst state ~~~~~\n {new_payment_state}\n~~~~~~~~~~~~~~~ end new inst state~~~~~~~"
 		)
+		doc.update_payment_totals()
 
 	if save:
 		doc.save()
@@ -109,6 +137,156 @@ def update_payments(fa, pe, save=False):
 				# Don't raise exception to avoid breaking payment processing
 
 
+def update_down_payment_totals(doc):
+	"""Recompute the down payment fields from the doc's payment_refs table."""
+	paid_down_payment = 0
+	for payment in doc.payment_refs:
+		paid_down_payment += payment.amount
+
+	doc.paid_down_payment_amount = (
+		paid_down_payment if paid_down_payment < doc.down_payment_amount else doc.down_payment_amount
+	)
+	doc.pending_down_payment_amount = max(0, doc.down_payment_amount - paid_down_payment)
+	if doc.down_payment_amount and doc.pending_down_payment_amount:
+		doc.paid_down_payment_percent = 100 * paid_down_payment / doc.down_payment_amount
+	else:
+		doc.paid_down_payment_percent = 100
+
+
+def remove_payment(doc, payment_entry):
+	"""Remove a Payment Entry from a Finance Application or submitted Payment Plan.
+
+	On a Payment Plan only the allocation slots from the first one holding the
+	payment are recomputed: earlier slots keep their stored allocation, and the
+	remaining payments are re-allocated over the rest of the plan. Installment
+	amounts, penalties, status and payment totals are written in a single save.
+	"""
+	doc.set("payment_refs", [payment for payment in doc.payment_refs if payment.payment_entry != payment_entry])
+	for idx, payment in enumerate(doc.payment_refs, start=1):
+		payment.idx = idx
+	update_down_payment_totals(doc)
+
+	if doc.doctype == "Payment Plan":
+		ledger = get_allocation_ledger(doc)
+		first_slot = next(
+			(
+				slot_idx
+				for slot_idx, slot in enumerate(ledger)
+				if any(ref["payment_entry"] == payment_entry for ref in slot["payment_refs"])
+			),
+			None,
+		)
+		if first_slot is not None:
+			reallocate_from_slot(doc, ledger, first_slot)
+		doc.calculate_overdue_penalties(update_db=False)
+		doc.update_payment_plan_state()
+
+	doc.flags.ignore_validate_update_after_submit = True
+	doc.save(ignore_permissions=True)
+
+
+def get_allocation_ledger(pp):
+	"""Read the stored allocation of a Payment Plan in `auto_alloc_payments` format.
+
+	Slot 0 is the down payment, slot i the i-th installment. Amounts are in cents.
+	Payment Entry Lists are loaded with one query.
+	"""
+	slots = [(pp.down_payment_ref_type, pp.down_payment_reference, pp.paid_down_payment_amount)]
+	slots += [(inst.payment_doctype, inst.payment_ref, inst.paid_amount) for inst in pp.installments]
+
+	payment_entry_lists = [ref for ref_type, ref, _amount in slots if ref and ref_type == "Payment Entry List"]
+	list_refs = {}
+	if payment_entry_lists:
+		for row in frappe.get_all(
+			"Payment Entry List Row",
+			filters={"parent": ["in", payment_entry_lists], "parenttype": "Payment Entry List"},
+			fields=["parent", "payment_entry", "paid_amount", "date"],
+			order_by="parent, idx",
+		):
+			list_refs.setdefault(row.parent, []).append(
+				{"payment_entry": row.payment_entry, "amount": to_cents(row.paid_amount), "date": row.date}
+			)
+
+	amounts = [pp.down_payment_amount] + [
+		installment.amount + (installment.penalty_amount or 0) for installment in pp.installments
+	]
+	ledger = []
+	for (ref_type, ref, paid_amount), amount in zip(slots, amounts, strict=True):
+		if not ref:
+			refs = []
+		elif ref_type == "Payment Entry List":
+			refs = list_refs.get(ref, [])
+		else:
+			refs = [{"payment_entry": ref, "amount": to_cents(paid_amount or 0), "date": None}]
+		ledger.append({"amount": to_cents(amount or 0), "payment_refs": refs})
+	return ledger
+
+
+def reallocate_from_slot(pp, ledger, first_slot):
+	"""Re-run `auto_alloc_payments` over the slots from `first_slot` on.
+
+	Each remaining payment carries over only the part not already allocated to
+	earlier slots, so the stored allocation before `first_slot` stays untouched.
+	"""
+	allocated_before = {}
+	for slot in ledger[:first_slot]:
+		for ref in slot["payment_refs"]:
+			allocated_before[ref["payment_entry"]] = allocated_before.get(ref["payment_entry"], 0) + ref["amount"]
+
+	remaining_payments = []
+	for payment in pp.payment_refs:
+		remaining = to_cents(payment.amount) - allocated_before.pop(payment.payment_entry, 0)
+		if remaining < 0:
+			# a payment is listed more than once in payment_refs; carry the excess to its next row
+			allocated_before[payment.payment_entry] = -remaining
+			remaining = 0
+		remaining_payments.append(
+			frappe._dict(payment_entry=payment.payment_entry, amount=from_cents(remaining), date=payment.date)
+		)
+
+	down_payment = pp.down_payment_amount if first_slot == 0 else 0
+	installments = pp.installments[max(first_slot - 1, 0) :]
+	suffix_state = auto_alloc_payments(down_payment, installments, remaining_payments)
+	if first_slot > 0:
+		# drop the placeholder down payment slot
+		suffix_state.pop(0)
+	else:
+		_apply_slot_state(pp, "down_payment_ref_type", "down_payment_reference", suffix_state.pop(0))
+
+	for installment, slot in zip(installments, suffix_state, strict=True):
+		_apply_slot_state(installment, "payment_doctype", "payment_ref", slot)
+		installment.paid_amount = from_cents(sum(ref["amount"] for ref in slot["payment_refs"]))
+		installment.pending_amount = installment.amount - installment.paid_amount + (installment.penalty_amount or 0)
+
+
+def _apply_slot_state(row, type_field, ref_field, slot):
+	refs = slot["payment_refs"]
+	if not refs:
+		row.set(type_field, None)
+		row.set(ref_field, None)
+	elif len(refs) == 1:
+		row.set(type_field, "Payment Entry")
+		row.set(ref_field, refs[0]["payment_entry"])
+	else:
+		if row.get(type_field) == "Payment Entry List" and row.get(ref_field):
+			pel = frappe.get_doc("Payment Entry List", row.get(ref_field))
+			pel.refs.clear()
+		else:
+			pel = frappe.new_doc("Payment Entry List")
+		for ref in refs:
+			pel.append(
+				"refs",
+				{
+					"payment_entry": ref["payment_entry"],
+					"paid_amount": from_cents(ref["amount"]),
+					"date": ref.get("date"),
+				},
+			)
+		pel.save()
+		row.set(type_field, "Payment Entry List")
+		row.set(ref_field, pel.name)
+
+
 def to_cents(amount):
 	return int(round(amount * 100))
 
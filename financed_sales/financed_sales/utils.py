@@ -2,66 +2,120 @@
 
 import frappe
 from decimal import Decimal, ROUND_HALF_EVEN
+from fractions import Fraction
 
 
 def distribute_interest_to_items(original_items, total_interest):
-	"""Distribute interest proportionally across items using banker's rounding.
-	
+	"""Distribute interest proportionally across items in integer cents.
+
+	Interest is split with the largest-remainder method: every line gets the
+	floor of its proportional share and the leftover cents go to the lines with
+	the largest remainders, so the shares add up to the interest exactly and no
+	single line absorbs the rounding. Shares are taken in steps of one cent per
+	unit (qty cents for integer quantities), so a line's financed rate times its
+	qty gives back its financed amount exactly. Whole steps are placed until the
+	cents left are fewer than the smallest step; those can only remain when no
+	line has a unit step, and then go to the largest line.
+
 	Args:
 		original_items: List of item objects with amount, rate, qty, item_code, etc.
 		total_interest (float): Total interest amount to distribute across items.
-	
+
 	Returns:
 		list: List of dicts compatible with Quotation Item structure containing
 			financed rates and amounts with interest included.
-	
+
 	Raises:
 		frappe.ValidationError: If no items provided or total base amount is zero.
 	"""
 	if not original_items:
 		frappe.throw("No items found to distribute interest")
-	
+
 	if total_interest <= 0:
 		return []
-	
-	total_base_amount = sum(Decimal(str(item.amount)) for item in original_items)
-	
-	if total_base_amount <= 0:
+
+	base_amounts = [to_cents(item.amount) for item in original_items]
+
+	if sum(base_amounts) <= 0:
 		frappe.throw("Total base amount must be greater than zero")
-	
+
+	interest = to_cents(total_interest)
+	steps = [_get_unit_step(item.qty) for item in original_items]
+	shares, leftover = _largest_remainder(interest, base_amounts, steps)
+	# keep placing whole steps until what is left is smaller than every step
+	while leftover >= min(steps):
+		extra, leftover = _largest_remainder(leftover, base_amounts, steps)
+		shares = [share + cents for share, cents in zip(shares, extra, strict=True)]
+	if leftover:
+		# only possible without unit-step lines: one adjustment line takes the residue
+		adjustment_idx = max(range(len(shares)), key=lambda idx: base_amounts[idx])
+		shares[adjustment_idx] += leftover
+
 	financed_items = []
-	total_interest_decimal = Decimal(str(total_interest))
-	distributed_interest = Decimal('0')
-	
-	for i, item in enumerate(original_items):
-		item_amount = Decimal(str(item.amount))
-		
-		if i == len(original_items) - 1:
-			interest_portion = total_interest_decimal - distributed_interest
-		else:
-			interest_portion = (item_amount / total_base_amount) * total_interest_decimal
-			interest_portion = interest_portion.quantize(Decimal('0.01'), rounding=ROUND_HALF_EVEN)
-			distributed_interest += interest_portion
-		
-		interest_per_unit = interest_portion / Decimal(str(item.qty))
-		financed_rate = Decimal(str(item.rate)) + interest_per_unit
-		financed_amount = financed_rate * Decimal(str(item.qty))
-		
+	for item, base_amount, share in zip(original_items, base_amounts, shares, strict=True):
+		financed_amount = (base_amount + share) / 100
+		financed_rate = financed_amount / item.qty if item.qty else item.rate
+
 		financed_items.append({
 			'item_code': item.item_code,
 			'item_name': item.item_name,
 			'qty': item.qty,
 			'uom': item.uom,
 			'conversion_factor': item.conversion_factor or 1,
-			'rate': float(financed_rate),
-			'amount': float(financed_amount),
-			'base_rate': float(financed_rate),
-			'base_amount': float(financed_amount)
+			'rate': financed_rate,
+			'amount': financed_amount,
+			'base_rate': financed_rate,
+			'base_amount': financed_amount
 		})
-	
+
 	return financed_items
 
 
+def to_cents(amount):
+	"""Convert a currency amount to integer cents (half-even rounding)."""
+	return int(Decimal(str(amount or 0)).scaleb(2).quantize(Decimal('1'), rounding=ROUND_HALF_EVEN))
+
+
+def _get_unit_step(qty):
+	# Smallest whole number of cents that raises the per-unit rate by whole cents
+	if not qty:
+		return 1
+	return abs(Fraction(str(qty)).numerator)
+
+
+def _largest_remainder(total, weights, steps):
+	"""Split `total` proportionally to `weights` in multiples of each line's step.
+
+	Returns:
+		tuple: (shares, leftover) where leftover are the cents that did not fit a full step.
+	"""
+	weight_total = sum(weights)
+	shares = []
+	remainders = []
+	for weight, step in zip(weights, steps, strict=True):
+		units, remainder = divmod(total * weight, weight_total * step)
+		shares.append(units * step)
+		remainders.append(remainder)
+
+	leftover = total - sum(shares)
+	for idx in sorted(range(len(shares)), key=lambda i: (-remainders[i], i)):
+		if not leftover:
+			break
+		if steps[idx] <= leftover:
+			shares[idx] += steps[idx]
+			leftover -= steps[idx]
+
+	return shares, leftover
+
+
+def get_cached_hash(name):
+	"""`frappe.cache().hgetall` with str field names (redis returns them as bytes)."""
+	return {
+		key.decode() if isinstance(key, bytes) else key: value
+		for key, value in frappe.cache().hgetall(name).items()
+	}
+
+
 def validate_financed_items_total(financed_items, original_total, interest_amount):
 	"""Validate that financed items total equals original total plus interest.
 	
@@ -11,38 +11,45 @@ def validate_payment_entry_references(doc, method):
     if doc.doctype != "Payment Entry":
         return
 
-    for ref in doc.get("references", []):
-        if ref.reference_doctype == "Sales Invoice":
-            finance_app = frappe.db.get_value(
-                "Sales Invoice",
-                ref.reference_name,
-                "custom_finance_application"
-            )
+    invoices = {
+        ref.reference_name
+        for ref in doc.get("references", [])
+        if ref.reference_doctype == "Sales Invoice" and ref.reference_name
+    }
+    if not invoices:
+        return
 
-            if finance_app:
-                if not doc.custom_is_finance_payment:
-                    frappe.throw(
-                        _(
-                            "Cannot create Payment Entry directly against financed Sales Invoice {0}. "
-                            "This invoice is linked to Finance Application {1}.<br><br>"
-                            "Please follow the proper workflow:<br>"
-                            "1. Go to the Finance Application {1}<br>"
-                            "2. Create payment from there or use the payment plan workflow"
-                        ).format(
-                            frappe.bold(ref.reference_name),
-                            frappe.bold(finance_app)
-                        ),
-                        title=_("Financed Sales Invoice - Direct Payment Not Allowed")
-                    )
+    # Resolve every referenced invoice's Finance Application in one query
+    finance_apps = {
+        invoice.name: invoice.custom_finance_application
+        for invoice in frappe.get_all(
+            "Sales Invoice",
+            filters={
+                "name": ["in", list(invoices)],
+                "custom_finance_application": ["is", "set"],
+            },
+            fields=["name", "custom_finance_application"],
+        )
+    }
+    if not finance_apps or doc.custom_is_finance_payment:
+        return
 
-                fa_name = frappe.get_value(
-                    "Sales Invoice", ref.reference_name, "custom_finance_application"
-                )
-                if not fa_name:
-                    frappe.throw(
-                        _(
-                            "Payment Entry with 'Finance Payment' enabled must reference "
-                            "a financed Sales Invoice with a valid Finance Application link."
-                        ),
-                        title=_("Invalid Finance Payment Configuration")
-                    )
+    for ref in doc.get("references", []):
+        if ref.reference_doctype != "Sales Invoice":
+            continue
+
+        finance_app = finance_apps.get(ref.reference_name)
+        if finance_app:
+            frappe.throw(
+                _(
+                    "Cannot create Payment Entry directly against financed Sales Invoice {0}. "
+                    "This invoice is linked to Finance Application {1}.<br><br>"
+                    "Please follow the proper workflow:<br>"
+                    "1. Go to the Finance Application {1}<br>"
+                    "2. Create payment from there or use the payment plan workflow"
+                ).format(
+                    frappe.bold(ref.reference_name),
+                    frappe.bold(finance_app)
+                ),
+                title=_("Financed Sales Invoice - Direct Payment Not Allowed")
+            )
@@ -11,27 +11,40 @@ def validate_sales_invoice_from_financed_order(doc, method):
     if hasattr(doc, 'custom_is_credit_invoice') and doc.custom_is_credit_invoice:
         return
 
+    sales_orders = {item.sales_order for item in doc.get("items", []) if item.sales_order}
+    if not sales_orders:
+        return
+
+    # Resolve every referenced Sales Order's Finance Application in one query
+    finance_applications = {
+        order.name: order.custom_finance_application
+        for order in frappe.get_all(
+            "Sales Order",
+            filters={
+                "name": ["in", list(sales_orders)],
+                "custom_finance_application": ["is", "set"],
+            },
+            fields=["name", "custom_finance_application"],
+        )
+    }
+    if not finance_applications:
+        return
+
     # Check each item to see if it references a Sales Order with Finance Application
     for item in doc.get("items", []):
-        if item.sales_order:
-            finance_application = frappe.db.get_value(
-                "Sales Order",
-                item.sales_order,
-                "custom_finance_application"
+        finance_application = finance_applications.get(item.sales_order)
+        if finance_application:
+            frappe.throw(
+                _(
+                    "Cannot create Sales Invoice manually from Sales Order {0} "
+                    "because it is linked to Finance Application {1}.<br><br>"
+                    "Please follow the proper workflow:<br>"
+                    "1. Go to the Finance Application {1}<br>"
+                    "2. Submit the Finance Application for approval<br>"
+                    "3. The system will automatically create the credit invoice"
+                ).format(
+                    frappe.bold(item.sales_order),
+                    frappe.bold(finance_application)
+                ),
+                title=_("Financed Sales Order - Manual Invoice Not Allowed")
             )
-
-            if finance_application:
-                frappe.throw(
-                    _(
-                        "Cannot create Sales Invoice manually from Sales Order {0} "
-                        "because it is linked to Finance Application {1}.<br><br>"
-                        "Please follow the proper workflow:<br>"
-                        "1. Go to the Finance Application {1}<br>"
-                        "2. Submit the Finance Application for approval<br>"
-                        "3. The system will automatically create the credit invoice"
-                    ).format(
-                        frappe.bold(item.sales_order),
-                        frappe.bold(finance_application)
-                    ),
-                    title=_("Financed Sales Order - Manual Invoice Not Allowed")
-                )
\ No newline at end of file
@@ -12,6 +12,9 @@ doctype_js = {
 	"Quotation": "public/js/quotation.js",
 	"Finance Application": "public/js/finance_application.js"
 }
+
+boot_session = "financed_sales.financed_sales.mode_of_payment.boot_session"
+
 fixtures = [
 	{"doctype": "Custom Field", "filters": [["fieldname", "like", "custom_%"], ["module", "=", "Financed Sales"]]},
 	{
@@ -42,14 +45,23 @@ doc_events = {
 	"Payment Entry": {
 		"validate": ["financed_sales.financed_sales.validate_payment_entry.validate_payment_entry_references"],
 		"on_submit": ["financed_sales.financed_sales.update_payments.main"],
+		"on_cancel": ["financed_sales.financed_sales.update_payments.on_cancel"],
 	},
 	"Sales Invoice": {
 		"validate": ["financed_sales.financed_sales.validate_sales_invoice.validate_sales_invoice_from_financed_order"],
 	},
+	"Mode of Payment": {
+		"on_update": ["financed_sales.financed_sales.mode_of_payment.clear_mode_of_payment_cache"],
+		"on_trash": ["financed_sales.financed_sales.mode_of_payment.clear_mode_of_payment_cache"],
+	},
 }
 scheduler_events = {
 	"daily": [
-		"financed_sales.scheduled_jobs.daily_penalty_calculation"
+		"financed_sales.scheduled_jobs.daily_penalty_calculation",
+		"financed_sales.financed_sales.collections_forecast.build_forecast_cache",
+	],
+	"daily_long": [
+		"financed_sales.financed_sales.portfolio_snapshot.take_portfolio_snapshot",
 	],
 }
 
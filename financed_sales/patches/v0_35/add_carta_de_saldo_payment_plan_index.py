@@ -0,0 +1,6 @@
+from financed_sales.financed_sales.doctype.carta_de_saldo import carta_de_saldo
+
+
+def execute():
+	"""Add the Carta de Saldo (payment_plan, docstatus) index on existing sites."""
+	carta_de_saldo.on_doctype_update()
@@ -0,0 +1,12 @@
+from financed_sales.financed_sales.doctype.financed_payment_ref import financed_payment_ref
+from financed_sales.financed_sales.doctype.payment_plan_installment import payment_plan_installment
+
+
+def execute():
+	"""Add the composite indexes used by the overdue and payment date queries.
+
+	Fresh installs get them from `on_doctype_update`; existing sites only re-run
+	that hook when the doctype JSON changes, so add them here as well.
+	"""
+	payment_plan_installment.on_doctype_update()
+	financed_payment_ref.on_doctype_update()
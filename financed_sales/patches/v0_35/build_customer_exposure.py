@@ -0,0 +1,12 @@
+import frappe
+
+from financed_sales.financed_sales.doctype.customer_exposure.customer_exposure import update_customer_exposure
+
+
+def execute():
+	"""Build the Customer Exposure record of every customer with a submitted Payment Plan."""
+	customers = frappe.get_all(
+		"Payment Plan", filters={"docstatus": 1}, pluck="customer", distinct=True, order_by="customer"
+	)
+	for customer in customers:
+		update_customer_exposure(customer)
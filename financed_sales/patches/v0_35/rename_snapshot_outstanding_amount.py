@@ -0,0 +1,6 @@
+from frappe.model.utils.rename_field import rename_field
+
+
+def execute():
+	"""Payment Plan Snapshot.outstanding_principal includes financed interest, so it is now outstanding_amount."""
+	rename_field("Payment Plan Snapshot", "outstanding_principal", "outstanding_amount")
@@ -0,0 +1,17 @@
+import frappe
+
+
+def execute():
+	"""Backfill Payment Plan total_paid and last_payment_date from the payment_refs table."""
+	frappe.db.sql(
+		"""
+		UPDATE `tabPayment Plan` pp
+		LEFT JOIN (
+			SELECT parent, SUM(amount) AS total_paid, MAX(date) AS last_payment_date
+			FROM `tabFinanced Payment Ref`
+			WHERE parenttype = 'Payment Plan'
+			GROUP BY parent
+		) refs ON refs.parent = pp.name
+		SET pp.total_paid = IFNULL(refs.total_paid, 0), pp.last_payment_date = refs.last_payment_date
+		"""
+	)
@@ -16,7 +16,61 @@ const genFacturaProforma = (frm) => {
 	});
 }
 
+const APPROVAL_STATUS_INDICATORS = {
+	'Queued': 'blue',
+	'Processing': 'orange',
+	'Failed': 'red'
+};
+
+const show_approval_status = (frm) => {
+	const indicator = APPROVAL_STATUS_INDICATORS[frm.doc.approval_status];
+	if (!indicator) return;
+
+	frm.dashboard.set_headline_alert(
+		__('Approval documents: {0}', [__(frm.doc.approval_status)]),
+		indicator
+	);
+	if (frm.doc.approval_status === 'Failed') {
+		frm.add_custom_button(__('Retry Approval'), () => {
+			frappe.call({
+				method: 'financed_sales.financed_sales.create_docs_on_approval.retry_approval',
+				args: { finance_application: frm.doc.name },
+				callback: () => frm.reload_doc()
+			});
+		});
+	}
+}
+
+const show_customer_exposure = (frm, exposure) => {
+	if (!exposure || !exposure.open_plans) return;
+
+	const message = __('{0} open Payment Plans: {1} outstanding, {2} overdue', [
+		exposure.open_plans,
+		format_currency(exposure.outstanding_amount),
+		format_currency(exposure.overdue_amount)
+	]);
+	frm.dashboard.add_comment(
+		exposure.worst_days_overdue
+			? message + ' ' + __('(up to {0} days late)', [exposure.worst_days_overdue])
+			: message,
+		exposure.overdue_amount ? 'red' : 'blue'
+	);
+}
+
 frappe.ui.form.on('Finance Application', {
+	setup: (frm) => {
+		frappe.realtime.on('finance_application_approval', (data) => {
+			if (data.name !== frm.doc.name) return;
+			frappe.show_alert({
+				message: data.status === 'Completed'
+					? __('Credit invoice and Payment Plan created')
+					: __('Approval documents could not be created'),
+				indicator: data.status === 'Completed' ? 'green' : 'red'
+			});
+			frm.reload_doc();
+		});
+	},
+
 	refresh: (frm) => {
 		// Only show button if doc is submitted
 		if (frm.doc.docstatus === 1) {
@@ -24,6 +78,19 @@ frappe.ui.form.on('Finance Application', {
 			   genFacturaProforma(frm);
 			}, __('Create'));
 		}
+		show_approval_status(frm);
+		show_customer_exposure(frm, frm.doc.__onload && frm.doc.__onload.customer_exposure);
+	},
+
+	customer: (frm) => {
+		// drop the previous customer's exposure, even if the new one has none
+		frm.dashboard.clear_comment();
+		if (!frm.doc.customer) return;
+		frappe.call({
+			method: 'financed_sales.financed_sales.doctype.customer_exposure.customer_exposure.get_customer_exposure',
+			args: { customer: frm.doc.customer },
+			callback: (r) => show_customer_exposure(frm, r.message)
+		});
 	}
 });
 
@@ -55,48 +122,51 @@ frappe.ui.form.on('Finance Application', {
 	rate_period: function(frm) {
 		generate_installments(frm);
 	},
+	amortization_method: function(frm) {
+		generate_installments(frm);
+	},
 	installment: function(frm) {
 		generate_installments(frm, user_installment=true);
 	}
 });
 
 function generate_installments(frm, user_installment=false){
-	frm.clear_table('installments');
 	if (frm.doc.total_amount_to_finance && frm.doc.interest_rate && frm.doc.repayment_term && frm.doc.application_fee && frm.doc.first_installment && frm.doc.down_payment_amount){
-		let owed_amount = frm.doc.total_amount_to_finance - frm.doc.down_payment_amount;
-		let monthly_pays = frm.doc.repayment_term;
-		let monthly_rate = frm.doc.interest_rate / (frm.doc.rate_period === "Monthly" ? 100 : 1200);
-		frm.set_df_property('installment', 'read_only', 0);
-		if (!user_installment) frm.doc.installment = owed_amount/monthly_pays + owed_amount*monthly_rate;
-		frm.set_df_property('installment', 'read_only', 1);
-		let monthly_payments = frm.doc.repayment_term;
-		for (let i = 0; i < monthly_payments; i++){
-			let row = frm.add_child('installments');
-			row.amount = frm.doc.installment;
-			row.due_date = frappe.datetime.add_months(frm.doc.first_installment, i);
-		}
-		frm.set_df_property('credit_expiration_date', 'read_only', 0);
-		frm.set_df_property('total_credit', 'read_only', 0);
-		frm.set_df_property('interests', 'read_only', 0);
-		frm.set_value('credit_expiration_date', frappe.datetime.add_months(frm.doc.first_installment, monthly_payments-1));
-		frm.set_value('total_credit', frm.doc.repayment_term*frm.doc.installment);
-		frm.set_value('interests',frm.doc.repayment_term*frm.doc.installment-(frm.doc.total_amount_to_finance-frm.doc.down_payment_amount))
-		frm.set_df_property('credit_expiration_date', 'read_only', 1);
-		frm.set_df_property('total_credit', 'read_only', 1);
-		frm.set_df_property('interests', 'read_only', 1);
-		frm.set_df_property('installment', 'read_only', 0); //since the installments table is populated allow the user to midify the installment amount
-		
-
-
+		frappe.call({
+			method: 'financed_sales.financed_sales.amortization.get_amortization_schedule',
+			args: {
+				total_amount_to_finance: frm.doc.total_amount_to_finance,
+				down_payment_amount: frm.doc.down_payment_amount,
+				interest_rate: frm.doc.interest_rate,
+				repayment_term: frm.doc.repayment_term,
+				first_installment: frm.doc.first_installment,
+				rate_period: frm.doc.rate_period,
+				amortization_method: frm.doc.amortization_method || 'Flat',
+				installment: user_installment ? frm.doc.installment : null
+			},
+			callback: (r) => {
+				if (!r.message) return;
+				const schedule = r.message;
+				// set directly so the installment trigger does not request the schedule again
+				frm.doc.installment = schedule.installment;
+				// the whole table and its totals go in one update
+				frm.set_value({
+					installments: schedule.installments,
+					credit_expiration_date: schedule.credit_expiration_date,
+					total_credit: schedule.total_credit,
+					interests: schedule.interests
+				});
+				frm.set_df_property('installment', 'read_only', 0); //since the installments table is populated allow the user to midify the installment amount
+				frm.refresh_field('installment');
+			}
+		});
 	} else {
+		frm.clear_table('installments');
 		frm.set_df_property('installment', 'read_only', 1); 
 		frm.set_value('installment', 0.00);
-
+		frm.refresh_field('installment');
+		frm.refresh_field('installments');
 	}
-
-	 
-	frm.refresh_field('installment');
-	frm.refresh_field('installments');
 }
 
 
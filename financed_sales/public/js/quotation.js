@@ -6,6 +6,11 @@ frappe.ui.form.on('Quotation', {
 			   apply_for_credit(frm);
 			}, __('Create'));
 		}
+		if (frm.doc.docstatus !== 2 && frm.doc.grand_total > 0) {
+			frm.add_custom_button(__('Compare Financing Options'), () => {
+				compare_financing_options(frm);
+			});
+		}
 	}
 });
 
@@ -47,6 +52,118 @@ const apply_for_credit = (frm) => {
 	});	
 }
 
+const parse_number_list = (value) => {
+	return (value || '').split(',').map(v => v.trim()).filter(v => v !== '').map(v => parseFloat(v));
+}
+
+const add_number_list_args = (args, values, fieldnames) => {
+	// empty lists are left out so the server uses its defaults
+	fieldnames.forEach(fieldname => {
+		const numbers = parse_number_list(values[fieldname]);
+		if (numbers.length) {
+			args[fieldname] = numbers;
+		}
+	});
+	return args;
+}
+
+const compare_financing_options = (frm) => {
+	const dialog = new frappe.ui.Dialog({
+		title: __('Compare Financing Options'),
+		size: 'large',
+		fields: [
+			{
+				fieldname: 'terms',
+				fieldtype: 'Data',
+				label: __('Terms (months)'),
+				default: '6, 12, 18, 24',
+				description: __('Comma separated')
+			},
+			{
+				fieldname: 'interest_rates',
+				fieldtype: 'Data',
+				label: __('Interest Rates %'),
+				description: __('Comma separated. Leave empty to use the default rate')
+			},
+			{
+				fieldname: 'column_break_options',
+				fieldtype: 'Column Break'
+			},
+			{
+				fieldname: 'down_payment_percents',
+				fieldtype: 'Data',
+				label: __('Down Payment %'),
+				description: __('Comma separated. Leave empty to use the default percent')
+			},
+			{
+				fieldname: 'amortization_method',
+				fieldtype: 'Select',
+				label: __('Amortization Method'),
+				options: 'Flat\nFrench',
+				default: 'Flat'
+			},
+			{
+				fieldname: 'section_break_results',
+				fieldtype: 'Section Break'
+			},
+			{
+				fieldname: 'results',
+				fieldtype: 'HTML'
+			}
+		],
+		primary_action_label: __('Compare'),
+		primary_action: (values) => {
+			frappe.call({
+				method: 'financed_sales.financed_sales.amortization.compare_financing_options',
+				args: add_number_list_args(
+					{
+						quotation: frm.doc.name,
+						amortization_method: values.amortization_method
+					},
+					values,
+					['terms', 'interest_rates', 'down_payment_percents']
+				),
+				freeze: true,
+				callback: (r) => {
+					if (r.message) {
+						dialog.fields_dict.results.$wrapper.html(get_comparison_table_html(r.message));
+					}
+				}
+			});
+		}
+	});
+	dialog.show();
+}
+
+const get_comparison_table_html = (options) => {
+	const rows = options.map(option => `
+		<tr>
+			<td>${option.term}</td>
+			<td>${format_number(option.interest_rate)}%</td>
+			<td>${format_currency(option.down_payment_amount)} (${format_number(option.down_payment_percent)}%)</td>
+			<td>${format_currency(option.installment)}</td>
+			<td>${format_currency(option.total_credit)}</td>
+			<td>${format_currency(option.interests)}</td>
+		</tr>
+	`).join('');
+
+	return `
+		<table class="table table-bordered table-sm">
+			<thead>
+				<tr>
+					<th>${__('Term')}</th>
+					<th>${__('Rate')}</th>
+					<th>${__('Down Payment')}</th>
+					<th>${__('Installment')}</th>
+					<th>${__('Total Credit')}</th>
+					<th>${__('Interests')}</th>
+				</tr>
+			</thead>
+			<tbody>${rows}</tbody>
+		</table>
+	`;
+}
+
 const check_customer_credit_status = (frm) => {
 	// Optional: Check if customer has existing credit applications
 	frappe.call({
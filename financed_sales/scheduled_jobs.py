@@ -4,14 +4,19 @@
 """Scheduled jobs for Financed Sales app."""
 
 import frappe
-from financed_sales.financed_sales.page.overdue_financed_sales.overdue_financed_sales import get_overdue_data
+from financed_sales.financed_sales.doctype.customer_exposure.customer_exposure import update_customer_exposure
+from financed_sales.financed_sales.page.overdue_financed_sales.overdue_financed_sales import (
+	invalidate_overdue_cache,
+	query_overdue_rows,
+)
 
 
 def daily_penalty_calculation():
 	"""Daily scheduled task to calculate penalties for all overdue payment plans.
 	
-	Uses the existing get_overdue_data function to identify payment plans with overdue
-	installments and applies penalties to them.
+	Uses the overdue query behind the overdue page to identify payment plans with overdue
+	installments and applies penalties to them, then refreshes the exposure of
+	their customers.
 	
 	Returns:
 		dict: Summary of penalty calculations with counts and totals.
@@ -25,19 +30,23 @@ def daily_penalty_calculation():
 	company_name = company[0]["name"]
 	total_plans = 0
 	total_penalties_applied = 0
+	customers = set()
 	
 	try:
-		# Use existing overdue function to get overdue payment plans
-		overdue_plans = get_overdue_data(company_name)
+		# Every overdue payment plan, whatever its company
+		overdue_plans = query_overdue_rows().values()
 		
 		# Process each overdue payment plan
 		for plan_data in overdue_plans:
 			try:
 				payment_plan = frappe.get_doc("Payment Plan", plan_data["payment_plan"])
 				penalties_applied = payment_plan.calculate_overdue_penalties()
+				if penalties_applied:
+					invalidate_overdue_cache(payment_plan.name)
 				
 				total_penalties_applied += penalties_applied
 				total_plans += 1
+				customers.add(plan_data["customer"])
 				
 			except Exception as e:
 				frappe.log_error(
@@ -50,7 +59,17 @@ def daily_penalty_calculation():
 			f"Failed to get overdue data for company {company_name}: {str(e)}",
 			"Daily Penalty Calculation"
 		)
-	
+
+	# Overdue amounts move as installments fall due, not only when a penalty changes
+	for customer in customers:
+		try:
+			update_customer_exposure(customer)
+		except Exception as e:
+			frappe.log_error(
+				f"Failed to update exposure for Customer {customer}: {e!s}",
+				"Daily Penalty Calculation"
+			)
+
 	# Log summary
 	frappe.logger().info(
 		f"Daily penalty calculation completed: {total_plans} overdue plans processed, "